@@ -0,0 +1,39 @@
+"""
+metadata.json 읽기 캐시
+파일 mtime이 변하지 않았으면 파싱 없이 캐시된 dict를 반환
+"""
+from pathlib import Path
+from typing import Dict, Tuple
+
+import orjson
+
+# {경로: (mtime, 파싱된 metadata)}
+_META_CACHE: Dict[Path, Tuple[float, dict]] = {}
+
+
+def read_metadata(metadata_path: Path) -> dict:
+    """
+    metadata.json 읽기 (mtime 기반 캐시)
+
+    Args:
+        metadata_path: metadata.json 경로
+
+    Returns:
+        파싱된 메타데이터 dict
+    """
+    mtime = metadata_path.stat().st_mtime
+    cached = _META_CACHE.get(metadata_path)
+
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    # 캐시 미스 시에만 파싱 (orjson이 stdlib json보다 ~3배 빠름)
+    metadata = orjson.loads(metadata_path.read_bytes())
+
+    _META_CACHE[metadata_path] = (mtime, metadata)
+    return metadata
+
+
+def invalidate_metadata(metadata_path: Path):
+    """메타데이터 저장 후 캐시 무효화"""
+    _META_CACHE.pop(metadata_path, None)
@@ -4,13 +4,15 @@
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
 import os
+import orjson
 from pathlib import Path
-import json
 
-from rag.qa import answer_question
+from rag.qa import answer_question, stream_answer
+from api.metadata_cache import read_metadata
 
 router = APIRouter()
 
@@ -31,11 +33,33 @@ class QuestionResponse(BaseModel):
     knowledge_stats: Dict[str, int]
 
 
+def _validate_knowledge(knowledge_names: List[str]):
+    """지식베이스 존재/임베딩 여부 확인 (일반/스트리밍 엔드포인트 공용)"""
+    for knowledge_name in knowledge_names:
+        base_dir = Path("document_sets") / knowledge_name
+        if not base_dir.exists():
+            raise HTTPException(
+                status_code=404,
+                detail=f"지식 '{knowledge_name}'이(가) 존재하지 않습니다."
+            )
+
+        chroma_dir = base_dir / "chroma_db"
+        if not chroma_dir.exists():
+            raise HTTPException(
+                status_code=400,
+                detail=f"지식 '{knowledge_name}'의 임베딩이 아직 생성되지 않았습니다."
+            )
+
+
 @router.post("/ask", response_model=QuestionResponse)
-async def ask_question(request: QuestionRequest):
+def ask_question(request: QuestionRequest):
     """
     질문에 대한 답변 생성
-    
+
+    일반 def로 선언해 FastAPI가 스레드풀에서 실행하도록 함 -
+    파이프라인 내부의 asyncio.run은 이벤트 루프가 없는 스레드에서만
+    동작하고, 블로킹 LLM 호출이 메인 루프를 점유하지도 않음
+
     - **knowledge_names**: 검색할 지식베이스 이름들 (복수 선택 가능)
     - **question**: 사용자 질문
     - **top_k_per_knowledge**: 각 지식에서 가져올 문서 수 (기본 3개)
@@ -43,21 +67,8 @@ async def ask_question(request: QuestionRequest):
     """
     try:
         # 지식베이스 존재 여부 확인
-        for knowledge_name in request.knowledge_names:
-            base_dir = Path("document_sets") / knowledge_name
-            if not base_dir.exists():
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"지식 '{knowledge_name}'이(가) 존재하지 않습니다."
-                )
-            
-            chroma_dir = base_dir / "chroma_db"
-            if not chroma_dir.exists():
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"지식 '{knowledge_name}'의 임베딩이 아직 생성되지 않았습니다."
-                )
-        
+        _validate_knowledge(request.knowledge_names)
+
         # RAG 파이프라인 실행
         result = answer_question(
             knowledge_names=request.knowledge_names,
@@ -78,6 +89,35 @@ async def ask_question(request: QuestionRequest):
         )
 
 
+@router.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    질문에 대한 답변을 SSE로 스트리밍
+
+    전체 답변이 완성될 때까지 기다리지 않고 토큰이 생성되는 대로
+    'data: {...}' 이벤트를 내려보냄 (delta 이벤트들 후 meta 이벤트 1회)
+    """
+    _validate_knowledge(request.knowledge_names)
+
+    def event_source():
+        try:
+            for event in stream_answer(
+                knowledge_names=request.knowledge_names,
+                question=request.question,
+                top_k_per_knowledge=request.top_k_per_knowledge,
+                final_top_k=request.final_top_k,
+                use_reasoning_model=request.use_reasoning_model
+            ):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        except Exception as e:
+            # 스트림 시작 후에는 상태코드를 바꿀 수 없으므로 에러도 이벤트로 전달
+            yield b"data: " + orjson.dumps(
+                {"type": "error", "detail": str(e)}
+            ) + b"\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream")
+
+
 @router.get("/available-knowledge", response_model=List[Dict[str, str]])
 async def get_available_knowledge():
     """
@@ -107,15 +147,13 @@ async def get_available_knowledge():
             if not chroma_dir.exists():
                 continue
             
-            # 메타데이터 읽기
+            # 메타데이터 읽기 (mtime 캐시 경유)
             metadata_path = knowledge_dir / "metadata.json"
             description = ""
-            
+
             if metadata_path.exists():
                 try:
-                    with open(metadata_path, "r", encoding="utf-8") as f:
-                        metadata = json.load(f)
-                        description = metadata.get("description", "")
+                    description = read_metadata(metadata_path).get("description", "")
                 except:
                     pass
             
@@ -1,68 +1,123 @@
 """
 PDF 표 자동 추출 도구
-pdfplumber를 사용하여 PDF에서 표를 추출하고 Excel로 변환
+PyMuPDF find_tables()로 PDF에서 표를 추출하고 Excel로 변환
+(표 탐지 실패 시 pdfplumber fallback)
 """
 import os
-from typing import List, Dict, Optional
-import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Dict, Optional, Tuple
+import fitz  # PyMuPDF
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
 
+def _extract_page(pdf_path: str, page_num: int) -> Tuple[int, List[List[List]]]:
+    """
+    단일 페이지에서 표 추출 (워커 프로세스에서 실행)
+
+    PyMuPDF의 C 기반 find_tables()를 우선 사용하고,
+    표를 못 찾은 페이지만 pdfplumber로 재시도 (fallback)
+
+    Args:
+        pdf_path: PDF 파일 경로
+        page_num: 페이지 번호 (1부터 시작)
+
+    Returns:
+        (페이지 번호, 추출된 raw 표 리스트)
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc[page_num - 1]
+        table_finder = page.find_tables()
+        tables = [t.extract() for t in table_finder.tables]
+    finally:
+        doc.close()
+
+    # PyMuPDF가 표를 못 찾으면 pdfplumber로 fallback (느리지만 탐지율 보완)
+    if not tables:
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            tables = pdf.pages[page_num - 1].extract_tables() or []
+
+    return page_num, tables
+
+
 class TableExtractor:
     """PDF에서 표를 추출하는 클래스"""
-    
-    def __init__(self, output_dir: str = "./uploads/excel"):
+
+    def __init__(self, output_dir: str = "./uploads/excel", num_workers: int = None):
         """
         Args:
             output_dir: 추출된 Excel 파일을 저장할 디렉토리
+            num_workers: 페이지 병렬 처리 워커 수 (기본: CPU 수, 최대 4)
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-    
+        self.num_workers = num_workers or min(os.cpu_count() or 1, 4)
+
     def extract_tables_from_pdf(self, pdf_path: str) -> List[Dict]:
         """
-        PDF 파일에서 모든 표를 추출
-        
+        PDF 파일에서 모든 표를 추출 (페이지 단위 병렬 처리)
+
         Args:
             pdf_path: PDF 파일 경로
-            
+
         Returns:
             추출된 표 정보 리스트
         """
         tables_info = []
-        
+
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    # 페이지에서 표 추출 (기본 설정 사용)
-                    tables = page.extract_tables()
-                    
-                    if tables:
-                        for table_idx, table in enumerate(tables, start=1):
-                            # 빈 표 건너뛰기
-                            if not table or len(table) < 2:
-                                continue
-                            
-                            # DataFrame으로 변환
-                            df = self._convert_to_dataframe(table)
-                            
-                            if df is not None and not df.empty:
-                                # 미리보기 생성 (처음 5행)
-                                preview = df.head(5).to_string()
-                                
-                                tables_info.append({
-                                    'page': page_num,
-                                    'table_index': table_idx,
-                                    'data': df,
-                                    'preview': preview,
-                                    'shape': df.shape  # (행, 열)
-                                })
-        
+            # 페이지 수 확인
+            doc = fitz.open(str(pdf_path))
+            num_pages = len(doc)
+            doc.close()
+
+            if num_pages == 0:
+                return tables_info
+
+            # 페이지별 표 추출은 독립적이므로 프로세스 풀로 병렬 처리
+            if self.num_workers > 1 and num_pages > 1:
+                with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+                    results = list(executor.map(
+                        partial(_extract_page, str(pdf_path)),
+                        range(1, num_pages + 1)
+                    ))
+            else:
+                results = [_extract_page(str(pdf_path), p) for p in range(1, num_pages + 1)]
+
+            # DataFrame 변환은 부모 프로세스에서 수행 (DataFrame pickle 비용 회피)
+            for page_num, tables in results:
+                for table_idx, table in enumerate(tables, start=1):
+                    # 빈 표 건너뛰기
+                    if not table or len(table) < 2:
+                        continue
+
+                    # DataFrame으로 변환
+                    df = self._convert_to_dataframe(table)
+
+                    if df is not None and not df.empty:
+                        # 미리보기 생성 (처음 5행)
+                        # to_string()의 컬럼 폭 정렬 비용 없이 JSON 친화적 형태로
+                        preview = df.head(5).to_dict(orient='records')
+
+                        tables_info.append({
+                            'page': page_num,
+                            'table_index': table_idx,
+                            'data': df,
+                            # API 응답용 리스트 형태를 미리 계산 (.values.tolist() 재변환 방지)
+                            'data_list': df.to_numpy(dtype=object, copy=False).tolist(),
+                            'columns': df.columns.tolist(),
+                            'preview': preview,
+                            'shape': df.shape  # (행, 열)
+                        })
+
         except Exception as e:
             print(f"PDF 표 추출 중 오류: {str(e)}")
             raise
-        
+
         return tables_info
     
     def _convert_to_dataframe(self, table: List[List]) -> Optional[pd.DataFrame]:
@@ -79,25 +134,29 @@ class TableExtractor:
             
             # None 값 처리 - 빈 값도 의미있는 헤더로 유지
             headers = [str(h).strip() if h and str(h).strip() else f"컬럼{i+1}" for i, h in enumerate(headers)]
+
+            # object dtype NumPy 배열로 직접 생성
+            # (어차피 전부 문자열로 처리하므로 pandas 컬럼별 타입 추론 생략)
+            ncols = len(headers)
+            arr = np.full((len(data_rows), ncols), None, dtype=object)
+            for i, row in enumerate(data_rows):
+                arr[i, :min(len(row), ncols)] = row[:ncols]
+
+            df = pd.DataFrame(arr, columns=headers, copy=False)
             
-            # DataFrame 생성
-            df = pd.DataFrame(data_rows, columns=headers)
-            
-            # 병합된 셀 처리: 빈 셀을 위의 값으로 채우기
-            for col in df.columns:
-                # 빈 문자열, None, 공백만 있는 값을 NaN으로 변환
-                df[col] = df[col].replace(['', None, ' ', '  '], pd.NA)
-            
+            # 빈 문자열, None, 공백만 있는 값을 NaN으로 변환 (프레임 전체 한 번에)
+            df = df.replace({'': pd.NA, None: pd.NA, ' ': pd.NA, '  ': pd.NA})
+
             # 첫 번째 컬럼만 forward fill (병합된 셀 처리)
             if len(df.columns) > 0:
                 first_col = df.columns[0]
                 df[first_col] = df[first_col].ffill()
-            
+
             # 빈 행 제거
             df = df.dropna(how='all')
-            
-            # 공백 제거 및 None을 빈 문자열로
-            df = df.map(lambda x: str(x).strip() if pd.notna(x) and x is not pd.NA else '')
+
+            # 공백 제거 및 NA를 빈 문자열로 (셀 단위 df.map 대신 컬럼 단위 str 커널)
+            df = df.where(df.notna(), '').astype(str).apply(lambda s: s.str.strip(), axis=0)
             
             return df
         
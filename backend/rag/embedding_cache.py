@@ -0,0 +1,98 @@
+"""
+임베딩 결과 영구 캐시
+청크 텍스트의 SHA-256 해시를 key로 임베딩 벡터를 SQLite에 저장하여
+내용이 바뀌지 않은 청크는 OpenAI API 호출 없이 재사용
+"""
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings 래퍼: embed_documents 호출 시 캐시에 없는 텍스트만
+    실제 임베딩 모델에 전달하고 결과를 캐시에 저장
+
+    재임베딩(force_recreate) 시에도 내용이 같은 청크는 API 호출을 건너뛰므로
+    토큰 비용과 인덱싱 시간이 새 청크 분량으로 줄어듦
+    """
+
+    def __init__(self, base_embeddings: Embeddings, cache_path: Path, model: str):
+        """
+        Args:
+            base_embeddings: 실제 임베딩을 수행할 Embeddings 객체
+            cache_path: SQLite 캐시 파일 경로
+            model: 임베딩 모델명 (모델이 다르면 캐시 분리)
+        """
+        self.base_embeddings = base_embeddings
+        self.model = model
+        self.cache_path = Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            "hash TEXT NOT NULL, model TEXT NOT NULL, dim INT NOT NULL, vec BLOB NOT NULL, "
+            "PRIMARY KEY (hash, model))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """캐시 조회 후 미스인 텍스트만 실제 임베딩"""
+        if not texts:
+            return []
+
+        hashes = [self._text_hash(t) for t in texts]
+
+        # 캐시 일괄 조회 (999개씩 - SQLite 변수 개수 제한)
+        cached = {}
+        unique_hashes = list(set(hashes))
+        for i in range(0, len(unique_hashes), 999):
+            batch = unique_hashes[i:i + 999]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT hash, vec FROM emb WHERE model = ? AND hash IN ({placeholders})",
+                [self.model] + batch
+            ).fetchall()
+            for h, vec_blob in rows:
+                cached[h] = np.frombuffer(vec_blob, dtype=np.float32).tolist()
+
+        # 캐시 미스만 실제 임베딩 (중복 텍스트는 한 번만)
+        miss_hashes = []
+        miss_texts = []
+        seen = set()
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in seen:
+                seen.add(h)
+                miss_hashes.append(h)
+                miss_texts.append(t)
+
+        if miss_texts:
+            new_vectors = self.base_embeddings.embed_documents(miss_texts)
+
+            rows = [
+                (h, self.model, len(v), np.asarray(v, dtype=np.float32).tobytes())
+                for h, v in zip(miss_hashes, new_vectors)
+            ]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO emb (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+            for h, v in zip(miss_hashes, new_vectors):
+                cached[h] = v
+
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩은 캐시 없이 그대로 위임"""
+        return self.base_embeddings.embed_query(text)
@@ -0,0 +1,18 @@
+"""
+임베딩 모델/차원 공통 설정
+
+EMBED_DIMENSIONS 환경변수로 Matryoshka 차원 축소를 제어
+(예: 512 설정 시 인덱스 크기 약 1/3, 미설정 시 모델 기본 1536차원)
+인덱싱(embeddings.py)과 질의(qa.py)가 반드시 같은 차원을 쓰도록 여기서 공유
+"""
+import os
+
+EMBED_MODEL = "text-embedding-3-small"
+
+_dims = os.getenv("EMBED_DIMENSIONS")
+EMBED_DIMENSIONS = int(_dims) if _dims else None
+
+# 캐시/저장소에서 모델을 구분하는 키 (차원이 다르면 다른 임베딩으로 취급)
+EMBED_MODEL_KEY = (
+    f"{EMBED_MODEL}@{EMBED_DIMENSIONS}" if EMBED_DIMENSIONS else EMBED_MODEL
+)
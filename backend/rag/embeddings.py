@@ -2,18 +2,41 @@
 RAG 임베딩 모듈
 PDF/CSV 문서를 로드하고 청크로 분할한 후 ChromaDB에 임베딩
 """
+import bisect
+import json
 import os
+import queue
 import re
+import threading
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict
 import pandas as pd
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
+import pyarrow.csv as pacsv
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 import fitz  # PyMuPDF
 
+from rag.async_embedder import AsyncBatchEmbedder
+from rag.embedding_cache import CachedEmbeddings
+from rag.embedding_config import EMBED_DIMENSIONS, EMBED_MODEL, EMBED_MODEL_KEY
+
+
+def _extract_pdf_pages(pdf_path: str) -> List[str]:
+    """
+    단일 PDF의 페이지별 텍스트 추출 (워커 프로세스에서 실행)
+
+    전체 텍스트를 하나로 이어붙이지 않고 페이지 단위로 반환
+    → 대용량 PDF에서도 거대 문자열을 만들지 않고,
+      청크 분할이 페이지 경계를 넘지 않아 출처 페이지 추적이 정확해짐
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return [page.get_text() for page in doc]
+    finally:
+        doc.close()
+
 
 class KnowledgeEmbedder:
     """지식 베이스 임베딩 클래스"""
@@ -36,19 +59,95 @@ class KnowledgeEmbedder:
             raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다")
         
         # 임베딩 모델
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        # - AsyncBatchEmbedder: 배치를 동시 전송 (세마포어 + 429 백오프)
+        # - CachedEmbeddings: 내용이 같은 청크는 재임베딩 시 API 호출 생략
+        #   (캐시는 chroma_db 밖에 두어 force_recreate 시에도 유지됨)
+        self.embeddings = CachedEmbeddings(
+            AsyncBatchEmbedder(model=EMBED_MODEL, dimensions=EMBED_DIMENSIONS),
+            cache_path=self.knowledge_dir / "embcache.sqlite",
+            model=EMBED_MODEL_KEY
+        )
         
-        # 텍스트 분할기
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+        # 텍스트 분할 설정
+        # (RecursiveCharacterTextSplitter의 재귀 탐색 대신
+        #  미리 컴파일한 분리자 정규식으로 분할 지점을 한 번에 수집)
+        self.chunk_size = 1000
+        self.chunk_overlap = 200
+        self._sep_re = re.compile(
+            "|".join(map(re.escape, ["\n\n", "\n", ".", "!", "?", ",", " "]))
         )
         
         # ChromaDB 저장 경로
         self.chroma_dir = self.knowledge_dir / "chroma_db"
         self.chroma_dir.mkdir(parents=True, exist_ok=True)
     
+    def _split_fast(self, text: str) -> List[str]:
+        """
+        정규식 기반 고속 청크 분할
+
+        분리자 위치를 finditer로 한 번에 수집한 뒤 bisect로
+        목표 크기(chunk_size)에 가장 가까운 분할 지점을 찾음
+        → 분리자별 재귀 분할을 반복하는 LangChain 구현보다 훨씬 빠름
+        """
+        n = len(text)
+        if n <= self.chunk_size:
+            return [text] if text.strip() else []
+
+        # 분리자 끝 위치 목록 (분할 후보 지점)
+        breaks = [m.end() for m in self._sep_re.finditer(text)]
+
+        chunks = []
+        start = 0
+        while start < n:
+            target = start + self.chunk_size
+            if target >= n:
+                chunks.append(text[start:])
+                break
+
+            # target 이하의 가장 늦은 분리자 위치에서 자름 (없으면 강제 분할)
+            i = bisect.bisect_right(breaks, target) - 1
+            end = breaks[i] if i >= 0 and breaks[i] > start else target
+
+            chunks.append(text[start:end])
+
+            # 겹침(overlap)을 두고 다음 청크 시작 (전진 보장)
+            start = max(end - self.chunk_overlap, start + 1)
+
+        return [c for c in chunks if c.strip()]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Document 리스트를 메타데이터를 유지하며 청크로 분할"""
+        chunks = []
+        for doc in documents:
+            for piece in self._split_fast(doc.page_content):
+                chunks.append(Document(
+                    page_content=piece,
+                    metadata=dict(doc.metadata)
+                ))
+        return chunks
+
+    @staticmethod
+    def _dedup_chunks(chunks: List[Document]) -> List[Document]:
+        """
+        내용이 같은 청크 제거 (머리글/반복 행 등 보일러플레이트)
+        중복 청크는 임베딩 비용과 인덱스 크기만 늘리므로 저장 전에 걸러냄
+        """
+        seen = set()
+        unique_chunks = []
+        for chunk in chunks:
+            key = hashlib.blake2b(
+                chunk.page_content.strip().encode('utf-8'),
+                digest_size=16
+            ).digest()
+            if key not in seen:
+                seen.add(key)
+                unique_chunks.append(chunk)
+
+        if len(unique_chunks) < len(chunks):
+            print(f"✓ 중복 청크 {len(chunks) - len(unique_chunks)}개 제거")
+
+        return unique_chunks
+
     def load_pdf_documents(self) -> List[Document]:
         """PDF 파일들을 로드하여 Document 리스트로 변환"""
         documents = []
@@ -57,33 +156,43 @@ class KnowledgeEmbedder:
         if not pdf_dir.exists():
             return documents
         
-        for pdf_path in pdf_dir.glob("*.pdf"):
-            try:
-                # PyMuPDF로 PDF 텍스트 추출
-                doc = fitz.open(str(pdf_path))
-                full_text = ""
-                
-                for page_num, page in enumerate(doc, start=1):
-                    text = page.get_text()
-                    full_text += f"\n\n--- 페이지 {page_num} ---\n\n{text}"
-                
-                doc.close()
-                
-                # Document 생성
-                documents.append(Document(
-                    page_content=full_text,
-                    metadata={
-                        "source": pdf_path.name,
-                        "type": "pdf",
-                        "knowledge": self.knowledge_name
-                    }
-                ))
-                
-                print(f"✓ PDF 로드: {pdf_path.name}")
-                
-            except Exception as e:
-                print(f"✗ PDF 로드 실패 ({pdf_path.name}): {str(e)}")
-        
+        pdf_paths = sorted(pdf_dir.glob("*.pdf"))
+        if not pdf_paths:
+            return documents
+
+        # 파일 단위 병렬 추출 (PDF 파싱은 순수 CPU 작업)
+        max_workers = min(os.cpu_count() or 1, len(pdf_paths))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_extract_pdf_pages, str(pdf_path))
+                for pdf_path in pdf_paths
+            ]
+
+            for pdf_path, future in zip(pdf_paths, futures):
+                try:
+                    page_texts = future.result()
+
+                    # 페이지별 Document 생성
+                    # (파일 전체를 하나로 합치지 않으므로 메모리가 페이지 단위로 유지되고
+                    #  청크에 출처 페이지 번호가 남음)
+                    for page_num, page_text in enumerate(page_texts, start=1):
+                        if not page_text.strip():
+                            continue
+                        documents.append(Document(
+                            page_content=page_text,
+                            metadata={
+                                "source": pdf_path.name,
+                                "type": "pdf",
+                                "page": page_num,
+                                "knowledge": self.knowledge_name
+                            }
+                        ))
+
+                    print(f"✓ PDF 로드: {pdf_path.name} ({len(page_texts)}페이지)")
+
+                except Exception as e:
+                    print(f"✗ PDF 로드 실패 ({pdf_path.name}): {str(e)}")
+
         return documents
     
     def load_csv_documents(self) -> List[Document]:
@@ -96,21 +205,37 @@ class KnowledgeEmbedder:
         
         for csv_path in csv_dir.glob("*.csv"):
             try:
-                # CSV 읽기
-                df = pd.read_csv(csv_path, encoding='utf-8-sig')
-                
+                # feather 미러가 있으면 우선 사용 (CSV 재파싱보다 훨씬 빠름)
+                feather_path = csv_path.with_suffix('.feather')
+                if feather_path.exists():
+                    df = pd.read_feather(feather_path)
+                else:
+                    # PyArrow 멀티스레드 CSV 파서 (pandas 파서 대비 수 배 빠름)
+                    table = pacsv.read_csv(
+                        str(csv_path),
+                        read_options=pacsv.ReadOptions(encoding='utf-8-sig')
+                    )
+                    df = table.to_pandas()
+
+                # 파일명에서 설명 추출
+                file_stem = csv_path.stem
+                description = file_stem.split('_')[-1] if '_' in file_stem else ""
+
                 # DataFrame을 텍스트로 변환
-                rows_text = []
-                for idx, row in df.iterrows():
-                    row_text = " | ".join([f"{col}: {val}" for col, val in row.items() if pd.notna(val)])
-                    rows_text.append(row_text)
-                
+                # (iterrows는 행마다 Series를 생성하므로 컬럼 단위 벡터화 연산 사용)
+                notna_mask = df.notna().to_numpy()
+                cells = pd.DataFrame({
+                    col: col + ": " + df[col].astype(str)
+                    for col in df.columns
+                }).where(notna_mask, "")
+                rows_text = [
+                    " | ".join(v for v in row if v)
+                    for row in cells.to_numpy(dtype=object).tolist()
+                ]
+
                 full_text = "\n".join(rows_text)
                 if description:
                     full_text = f"[표 설명: {description}]\n\n{full_text}"
-                # 파일명에서 설명 추출
-                file_stem = csv_path.stem
-                description = file_stem.split('_')[-1] if '_' in file_stem else ""
                 
                 # Document 생성
                 documents.append(Document(
@@ -131,6 +256,143 @@ class KnowledgeEmbedder:
         
         return documents
     
+    def _read_embedded_sources(self) -> set:
+        """
+        임베딩된 파일명 목록 조회
+
+        chroma_db/_sources.json 사이드카를 우선 읽음 (O(파일 수)).
+        사이드카가 없으면(구버전 인덱스) 컬렉션 메타데이터 전체 스캔으로 복구.
+        """
+        sources_path = self.chroma_dir / "_sources.json"
+        if sources_path.exists():
+            return set(json.loads(sources_path.read_text(encoding='utf-8')))
+
+        # 사이드카가 없는 기존 인덱스: 메타데이터만 받아 한 번 복구
+        vectorstore = Chroma(
+            persist_directory=str(self.chroma_dir),
+            embedding_function=self.embeddings,
+            collection_name=self.collection_name
+        )
+        all_data = vectorstore._collection.get(include=["metadatas"])
+
+        existing_sources = set()
+        if all_data and 'metadatas' in all_data:
+            for metadata in all_data['metadatas']:
+                if metadata and 'source' in metadata:
+                    existing_sources.add(metadata['source'])
+
+        return existing_sources
+
+    def _write_embedded_sources(self, sources: set):
+        """임베딩된 파일명 사이드카 갱신"""
+        sources_path = self.chroma_dir / "_sources.json"
+        sources_path.write_text(
+            json.dumps(sorted(sources), ensure_ascii=False),
+            encoding='utf-8'
+        )
+
+    def _bulk_add_chunks(self, chunks: List[Document]) -> Chroma:
+        """
+        청크를 고정 크기 배치로 스트리밍하며 ChromaDB에 추가
+
+        - 임베딩은 배치 단위로 계산 (캐시 + 동시 배치 경유)
+          → 전체 벡터를 한꺼번에 메모리에 올리지 않음
+        - 생산자(임베딩)/소비자(upsert) 스레드 분리
+          → N+1번째 배치 임베딩과 N번째 배치 커밋이 겹쳐서 진행됨
+        - ID는 출처/페이지/내용 기반 SHA-1 → 같은 청크 재추가는 upsert로
+          중복 없이 멱등 처리됨
+        - 성공한 배치 수를 chroma_db/_progress.json에 기록
+          → 중간 실패 시 다음 실행에서 완료된 배치를 건너뛰고 재개
+        """
+        texts = [c.page_content for c in chunks]
+        metadatas = [c.metadata for c in chunks]
+        ids = [
+            hashlib.sha1(
+                f"{c.metadata.get('source', '')}:{c.metadata.get('page', '')}:{c.page_content}".encode('utf-8')
+            ).hexdigest()
+            for c in chunks
+        ]
+
+        batch_size = 256
+        num_batches = (len(chunks) + batch_size - 1) // batch_size
+
+        # 재개 지점 확인 (같은 청크 집합에 대한 중단된 작업만 이어서 진행)
+        progress_path = self.chroma_dir / "_progress.json"
+        signature = hashlib.sha1("".join(ids).encode('utf-8')).hexdigest()
+        start_batch = 0
+        if progress_path.exists():
+            try:
+                progress = json.loads(progress_path.read_text(encoding='utf-8'))
+                if progress.get("signature") == signature:
+                    start_batch = progress.get("done_batches", 0)
+                    print(f"✓ 중단된 작업 재개: {start_batch}/{num_batches} 배치 완료됨")
+            except Exception:
+                pass
+
+        vectorstore = Chroma(
+            persist_directory=str(self.chroma_dir),
+            embedding_function=self.embeddings,
+            collection_name=self.collection_name
+        )
+        collection = vectorstore._collection
+
+        batch_queue = queue.Queue(maxsize=4)
+        consumer_errors = []
+
+        def _consume():
+            while True:
+                item = batch_queue.get()
+                if item is None:
+                    return
+                batch_idx, sl = item
+                try:
+                    collection.upsert(
+                        ids=ids[sl],
+                        embeddings=vectors_by_batch.pop(batch_idx),
+                        documents=texts[sl],
+                        metadatas=metadatas[sl]
+                    )
+                    progress_path.write_text(
+                        json.dumps({"signature": signature, "done_batches": batch_idx + 1}),
+                        encoding='utf-8'
+                    )
+                except Exception as e:
+                    consumer_errors.append(e)
+                    # 생산자가 put에서 블로킹되지 않도록 남은 항목은 버리며 소진
+                    while batch_queue.get() is not None:
+                        pass
+                    return
+
+        vectors_by_batch = {}
+        consumer = threading.Thread(target=_consume, daemon=True)
+        consumer.start()
+
+        try:
+            for batch_idx in range(start_batch, num_batches):
+                if consumer_errors:
+                    break
+                sl = slice(batch_idx * batch_size, (batch_idx + 1) * batch_size)
+                vectors_by_batch[batch_idx] = self.embeddings.embed_documents(texts[sl])
+                batch_queue.put((batch_idx, sl))
+        finally:
+            batch_queue.put(None)
+            consumer.join()
+
+        if consumer_errors:
+            raise consumer_errors[0]
+
+        # 전 배치 성공 → 진행 상황 파일 제거
+        progress_path.unlink(missing_ok=True)
+
+        # 파일명 사이드카 갱신 (증분 모드 조회가 전체 스캔 없이 동작하도록)
+        added_sources = {c.metadata.get('source', '') for c in chunks} - {''}
+        sources_path = self.chroma_dir / "_sources.json"
+        if sources_path.exists():
+            added_sources |= set(json.loads(sources_path.read_text(encoding='utf-8')))
+        self._write_embedded_sources(added_sources)
+
+        return vectorstore
+
     def create_embeddings(self, force_recreate: bool = False) -> Dict:
         """
         문서를 임베딩하여 ChromaDB에 저장
@@ -161,21 +423,18 @@ class KnowledgeEmbedder:
             if not all_documents:
                 raise ValueError("로드된 문서가 없습니다")
             
-            print(f"\n총 {len(all_documents)}개 문서 로드 완료 (PDF: {len(pdf_docs)}, CSV: {len(csv_docs)})")
+            pdf_file_count = len({d.metadata['source'] for d in pdf_docs})
+            print(f"\n총 {len(all_documents)}개 문서 로드 완료 (PDF 파일: {pdf_file_count}, CSV: {len(csv_docs)})")
             
             # 문서 청크 분할
             print("\n=== 문서 청크 분할 중 ===")
-            chunks = self.text_splitter.split_documents(all_documents)
+            chunks = self.split_documents(all_documents)
             print(f"총 {len(chunks)}개 청크 생성")
+            chunks = self._dedup_chunks(chunks)
             
             # ChromaDB에 임베딩 저장
             print("\n=== ChromaDB 임베딩 중 ===")
-            vectorstore = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                persist_directory=str(self.chroma_dir),
-                collection_name=self.collection_name
-            )
+            vectorstore = self._bulk_add_chunks(chunks)
             
             print(f"✓ 전체 임베딩 완료: {len(chunks)}개 청크가 ChromaDB에 저장됨")
             
@@ -184,7 +443,7 @@ class KnowledgeEmbedder:
                 "mode": "full",
                 "knowledge_name": self.knowledge_name,
                 "total_documents": len(all_documents),
-                "pdf_count": len(pdf_docs),
+                "pdf_count": pdf_file_count,
                 "csv_count": len(csv_docs),
                 "total_chunks": len(chunks),
                 "new_chunks": len(chunks),
@@ -199,21 +458,8 @@ class KnowledgeEmbedder:
             existing_sources = set()
             if self.chroma_dir.exists() and list(self.chroma_dir.glob("*")):
                 try:
-                    vectorstore = Chroma(
-                        persist_directory=str(self.chroma_dir),
-                        embedding_function=self.embeddings,
-                        collection_name=self.collection_name
-                    )
-                    
-                    # 기존 문서의 source 메타데이터 수집
-                    collection = vectorstore._collection
-                    all_data = collection.get()
-                    
-                    if all_data and 'metadatas' in all_data:
-                        for metadata in all_data['metadatas']:
-                            if metadata and 'source' in metadata:
-                                existing_sources.add(metadata['source'])
-                    
+                    existing_sources = self._read_embedded_sources()
+
                     print(f"✓ 기존 임베딩 파일: {len(existing_sources)}개")
                     if existing_sources:
                         print(f"  파일 목록: {', '.join(sorted(existing_sources))}")
@@ -233,7 +479,8 @@ class KnowledgeEmbedder:
             if not all_documents:
                 raise ValueError("로드된 문서가 없습니다")
             
-            print(f"\n총 {len(all_documents)}개 문서 로드 완료 (PDF: {len(pdf_docs)}, CSV: {len(csv_docs)})")
+            pdf_file_count = len({d.metadata['source'] for d in pdf_docs})
+            print(f"\n총 {len(all_documents)}개 문서 로드 완료 (PDF 파일: {pdf_file_count}, CSV: {len(csv_docs)})")
             
             # 새 파일만 필터링
             new_documents = []
@@ -250,7 +497,7 @@ class KnowledgeEmbedder:
                     "mode": "incremental",
                     "knowledge_name": self.knowledge_name,
                     "total_documents": len(all_documents),
-                    "pdf_count": len(pdf_docs),
+                    "pdf_count": pdf_file_count,
                     "csv_count": len(csv_docs),
                     "total_chunks": 0,
                     "new_chunks": 0,
@@ -259,32 +506,18 @@ class KnowledgeEmbedder:
                 }
             
             print(f"\n✓ 새 문서 발견: {len(new_documents)}개")
-            new_sources = [doc.metadata.get('source') for doc in new_documents]
+            new_sources = sorted({doc.metadata.get('source') for doc in new_documents})
             print(f"  파일 목록: {', '.join(new_sources)}")
             
             # 새 문서 청크 분할
             print("\n=== 새 문서 청크 분할 중 ===")
-            new_chunks = self.text_splitter.split_documents(new_documents)
+            new_chunks = self.split_documents(new_documents)
             print(f"총 {len(new_chunks)}개 청크 생성")
+            new_chunks = self._dedup_chunks(new_chunks)
             
-            # 기존 vectorstore에 추가
+            # 기존 vectorstore에 추가 (첫 임베딩이어도 동일한 upsert 경로)
             print("\n=== ChromaDB에 추가 중 ===")
-            if not self.chroma_dir.exists() or not list(self.chroma_dir.glob("*")):
-                # 첫 임베딩
-                vectorstore = Chroma.from_documents(
-                    documents=new_chunks,
-                    embedding=self.embeddings,
-                    persist_directory=str(self.chroma_dir),
-                    collection_name=self.collection_name
-                )
-            else:
-                # 기존에 추가
-                vectorstore = Chroma(
-                    persist_directory=str(self.chroma_dir),
-                    embedding_function=self.embeddings,
-                    collection_name=self.collection_name
-                )
-                vectorstore.add_documents(new_chunks)
+            vectorstore = self._bulk_add_chunks(new_chunks)
             
             print(f"✓ 증분 임베딩 완료: {len(new_chunks)}개 청크 추가됨")
             
@@ -293,7 +526,7 @@ class KnowledgeEmbedder:
                 "mode": "incremental",
                 "knowledge_name": self.knowledge_name,
                 "total_documents": len(all_documents),
-                "pdf_count": len(pdf_docs),
+                "pdf_count": pdf_file_count,
                 "csv_count": len(csv_docs),
                 "total_chunks": len(existing_sources) + len(new_chunks),  # 대략적인 추정
                 "new_chunks": len(new_chunks),
@@ -3,16 +3,52 @@ RAG 질의응답 모듈
 Multi-Knowledge Retrieval 방식으로 복수 지식베이스에서 검색 및 답변 생성
 """
 
+import asyncio
 import os
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
 import hashlib
 
+import numpy as np
+
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_chroma import Chroma
 from langchain.schema import Document
 from langchain.prompts import ChatPromptTemplate
 
+from rag.embedding_config import EMBED_DIMENSIONS, EMBED_MODEL
+
+# 임베딩 클라이언트는 모든 지식베이스가 공유 (HTTPX 클라이언트 재초기화 방지)
+# 차원 설정은 인덱싱 측과 동일해야 하므로 embedding_config에서 가져옴
+_EMB = OpenAIEmbeddings(model=EMBED_MODEL, dimensions=EMBED_DIMENSIONS)
+
+# 시스템 프롬프트는 정적이므로 템플릿은 모듈 로드 시 한 번만 파싱
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """당신은 제공된 문서를 기반으로 정확하게 답변하는 AI 어시스턴트입니다.
+
+다음 규칙을 반드시 지켜주세요:
+1. 제공된 컨텍스트만을 사용하여 답변하세요.
+2. 컨텍스트에 없는 내용은 추측하지 마세요.
+3. 답변할 때 어느 출처에서 가져온 정보인지 [출처 번호]를 명시하세요.
+4. 한국어로 친절하고 명확하게 답변하세요.
+5. 가능한 한 자세하고 구체적으로 설명하세요. 예시와 세부사항을 포함하세요.
+6. 각 주요 포인트를 충분히 설명하고, 필요하다면 여러 문단으로 나누어 작성하세요.
+7. 컨텍스트에 답이 없다면 솔직히 "제공된 문서에서 관련 정보를 찾을 수 없습니다"라고 말하세요."""),
+    ("user", """컨텍스트:
+{context}
+
+질문: {question}
+
+답변:""")
+])
+
+
+@lru_cache(maxsize=4)
+def _get_llm(model_name: str) -> ChatOpenAI:
+    """모델별 ChatOpenAI 인스턴스 재사용 (HTTPX 클라이언트 포함)"""
+    return ChatOpenAI(model=model_name, temperature=0)
+
 
 def get_collection_name(knowledge_name: str) -> str:
     """지식명으로부터 ChromaDB collection 이름 생성"""
@@ -20,25 +56,48 @@ def get_collection_name(knowledge_name: str) -> str:
     return f"kb_{hash_suffix}"
 
 
-def get_retriever(knowledge_name: str, top_k: int = 3):
-    """단일 지식베이스의 retriever 생성"""
+@lru_cache(maxsize=32)
+def _get_vectorstore(knowledge_name: str) -> Chroma:
+    """
+    지식베이스별 Chroma 핸들 캐시
+
+    매 질문마다 Chroma를 새로 열면 SQLite 오픈과 HNSW 메타데이터 로드가
+    반복되므로 지식명 기준으로 재사용
+    """
     base_dir = Path("document_sets") / knowledge_name
     chroma_dir = base_dir / "chroma_db"
-    
+
     if not chroma_dir.exists():
         raise ValueError(f"지식 '{knowledge_name}'의 임베딩이 존재하지 않습니다.")
-    
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    collection_name = get_collection_name(knowledge_name)
-    
-    vectorstore = Chroma(
-        collection_name=collection_name,
-        embedding_function=embeddings,
+
+    return Chroma(
+        collection_name=get_collection_name(knowledge_name),
+        embedding_function=_EMB,
         persist_directory=str(chroma_dir)
     )
-    
+
+
+def clear_retriever_cache():
+    """재임베딩 후 캐시된 Chroma 핸들 무효화 (관리자 임베딩 완료 시 호출)"""
+    _get_vectorstore.cache_clear()
+
+
+@lru_cache(maxsize=1024)
+def _embed_query(text: str) -> Tuple[float, ...]:
+    """
+    쿼리 임베딩 LRU 캐시
+
+    채팅에서는 같은 질문을 다시 묻는 경우가 흔하므로
+    동일 문자열 재질문 시 OpenAI 호출을 건너뜀
+    (lru_cache 키로 쓰기 위해 tuple로 반환)
+    """
+    return tuple(_EMB.embed_query(text))
+
+
+def get_retriever(knowledge_name: str, top_k: int = 3):
+    """단일 지식베이스의 retriever 생성"""
     # as_retriever() 대신 직접 검색하기 위해 vectorstore 반환
-    return vectorstore
+    return _get_vectorstore(knowledge_name)
 
 
 def merge_and_rerank_documents(
@@ -56,95 +115,169 @@ def merge_and_rerank_documents(
         유사도 순으로 정렬된 상위 k개 문서
     """
     all_docs = []
-    
+
     # 모든 문서 수집 (유사도 점수 포함)
     for docs in docs_list:
         all_docs.extend(docs)
-    
-    # 유사도 점수로 정렬 (Document 객체에 metadata['score'] 있다고 가정)
-    # ChromaDB의 similarity_search_with_score 사용 시 score 포함됨
-    sorted_docs = sorted(
-        all_docs, 
-        key=lambda x: x.metadata.get('score', 0),
-        reverse=True
+
+    if len(all_docs) <= top_k:
+        return sorted(
+            all_docs,
+            key=lambda x: x.metadata.get('score', 0),
+            reverse=True
+        )
+
+    # 상위 k개만 필요하므로 전체 정렬 대신 argpartition으로 O(N) 선별
+    # (score는 relevance score라 높을수록 유사 - 부호 반전 후 오름차순 분할)
+    scores = np.fromiter(
+        (doc.metadata.get('score', 0.0) for doc in all_docs),
+        dtype=np.float32,
+        count=len(all_docs)
     )
-    
-    return sorted_docs[:top_k]
+    idx = np.argpartition(-scores, top_k)[:top_k]
+    idx = idx[np.argsort(-scores[idx])]
 
+    return [all_docs[i] for i in idx]
 
-def retrieve_documents(
-    knowledge_names: List[str], 
-    question: str, 
+
+def _search_one_knowledge(
+    knowledge_name: str,
+    query_embedding: List[float],
+    top_k: int
+) -> List[Document]:
+    """단일 지식베이스에서 미리 계산된 쿼리 임베딩으로 검색 (스레드에서 실행)"""
+    vectorstore = _get_vectorstore(knowledge_name)
+
+    docs_with_scores = vectorstore.similarity_search_by_vector_with_relevance_scores(
+        query_embedding,
+        k=top_k
+    )
+
+    # Document 객체에 score 메타데이터 추가
+    docs = []
+    for doc, score in docs_with_scores:
+        doc.metadata['score'] = score
+        doc.metadata['knowledge_name'] = knowledge_name
+        docs.append(doc)
+
+    return docs
+
+
+async def retrieve_documents_async(
+    knowledge_names: List[str],
+    question: str,
     top_k_per_knowledge: int = 3,
     final_top_k: int = 5
 ) -> Tuple[List[Document], Dict[str, int]]:
     """
-    Multi-Knowledge Retrieval: 복수 지식베이스에서 문서 검색 및 병합
-    
+    Multi-Knowledge Retrieval: 복수 지식베이스에서 동시 검색 및 병합
+
+    쿼리 임베딩은 한 번만 계산해 모든 지식베이스가 공유하고,
+    지식베이스별 HNSW 검색은 asyncio.gather로 동시에 수행
+    (전체 지연 시간이 합계가 아닌 가장 느린 지식베이스 수준으로 줄어듦)
+
     Args:
         knowledge_names: 검색할 지식베이스 이름 리스트
         question: 사용자 질문
         top_k_per_knowledge: 각 지식베이스에서 가져올 문서 개수
         final_top_k: 최종 반환할 문서 개수
-    
+
     Returns:
         (검색된 문서 리스트, 지식별 문서 개수 통계)
     """
-    docs_list = []
     knowledge_stats = {name: 0 for name in knowledge_names}
-    
-    # 각 지식베이스에서 검색
-    for knowledge_name in knowledge_names:
-        try:
-            vectorstore = get_retriever(knowledge_name, top_k_per_knowledge)
-            
-            # 유사도 점수와 함께 검색
-            docs_with_scores = vectorstore.similarity_search_with_score(
-                question, 
-                k=top_k_per_knowledge
+
+    # 쿼리 임베딩 1회 계산 (지식베이스 수만큼 중복 API 호출 방지)
+    # 동일 질문 재입력 시에는 LRU 캐시에서 바로 반환
+    query_embedding = list(await asyncio.to_thread(_embed_query, question))
+
+    # 각 지식베이스에서 동시 검색
+    results = await asyncio.gather(
+        *[
+            asyncio.to_thread(
+                _search_one_knowledge,
+                knowledge_name,
+                query_embedding,
+                top_k_per_knowledge
             )
-            
-            # Document 객체에 score 메타데이터 추가
-            docs = []
-            for doc, score in docs_with_scores:
-                doc.metadata['score'] = score
-                doc.metadata['knowledge_name'] = knowledge_name
-                docs.append(doc)
-            
-            docs_list.append(docs)
-            
-        except Exception as e:
-            print(f"Warning: '{knowledge_name}'에서 검색 실패 - {str(e)}")
+            for knowledge_name in knowledge_names
+        ],
+        return_exceptions=True
+    )
+
+    docs_list = []
+    for knowledge_name, result in zip(knowledge_names, results):
+        if isinstance(result, Exception):
+            print(f"Warning: '{knowledge_name}'에서 검색 실패 - {str(result)}")
             continue
-    
+        docs_list.append(result)
+
     # 문서 병합 및 재정렬
     if not docs_list:
         return [], knowledge_stats
-    
+
     final_docs = merge_and_rerank_documents(docs_list, final_top_k)
-    
+
     # 통계 집계
     for doc in final_docs:
         kb_name = doc.metadata.get('knowledge_name', 'unknown')
         if kb_name in knowledge_stats:
             knowledge_stats[kb_name] += 1
-    
+
     return final_docs, knowledge_stats
 
 
+def retrieve_documents(
+    knowledge_names: List[str],
+    question: str,
+    top_k_per_knowledge: int = 3,
+    final_top_k: int = 5
+) -> Tuple[List[Document], Dict[str, int]]:
+    """retrieve_documents_async의 동기 래퍼 (기존 호출부 호환용)"""
+    return asyncio.run(retrieve_documents_async(
+        knowledge_names=knowledge_names,
+        question=question,
+        top_k_per_knowledge=top_k_per_knowledge,
+        final_top_k=final_top_k
+    ))
+
+
+def _build_sources(documents: List[Document]) -> List[Dict[str, Any]]:
+    """검색 문서에서 출처 정보 목록 구성 (일반/스트리밍 경로 공용)"""
+    return [
+        {
+            'index': i,
+            'knowledge_name': doc.metadata.get('knowledge_name', 'Unknown'),
+            'source_file': doc.metadata.get('source', 'Unknown'),
+            'page': doc.metadata.get('page', 'N/A'),
+            'score': doc.metadata.get('score', 0),
+            'content_preview': doc.page_content[:100] + '...' if len(doc.page_content) > 100 else doc.page_content
+        }
+        for i, doc in enumerate(documents, 1)
+    ]
+
+
+def _build_context(documents: List[Document]) -> str:
+    """검색 문서를 프롬프트 컨텍스트 문자열로 구성"""
+    return "\n\n".join(
+        f"[출처 {i}]\n{doc.page_content}"
+        for i, doc in enumerate(documents, 1)
+    )
+
+
 def generate_answer(
-    documents: List[Document], 
+    documents: List[Document],
     question: str,
     model_name: str = "gpt-4o-mini"
 ) -> Dict[str, Any]:
     """
     검색된 문서를 바탕으로 GPT를 이용해 답변 생성
-    
+
     Args:
         documents: 검색된 문서 리스트
         question: 사용자 질문
         model_name: 사용할 OpenAI 모델
-    
+
     Returns:
         {
             'answer': 생성된 답변,
@@ -156,52 +289,16 @@ def generate_answer(
             'answer': "죄송합니다. 관련된 정보를 찾을 수 없습니다.",
             'sources': []
         }
-    
-    # 컨텍스트 구성
-    context_parts = []
-    sources = []
-    
-    for i, doc in enumerate(documents, 1):
-        # 출처 정보 추출
-        source_info = {
-            'index': i,
-            'knowledge_name': doc.metadata.get('knowledge_name', 'Unknown'),
-            'source_file': doc.metadata.get('source', 'Unknown'),
-            'page': doc.metadata.get('page', 'N/A'),
-            'score': doc.metadata.get('score', 0),
-            'content_preview': doc.page_content[:100] + '...' if len(doc.page_content) > 100 else doc.page_content
-        }
-        sources.append(source_info)
-        
-        # 컨텍스트 텍스트
-        context_parts.append(f"[출처 {i}]\n{doc.page_content}")
-    
-    context = "\n\n".join(context_parts)
-    
-    # 프롬프트 구성
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", """당신은 제공된 문서를 기반으로 정확하게 답변하는 AI 어시스턴트입니다.
 
-다음 규칙을 반드시 지켜주세요:
-1. 제공된 컨텍스트만을 사용하여 답변하세요.
-2. 컨텍스트에 없는 내용은 추측하지 마세요.
-3. 답변할 때 어느 출처에서 가져온 정보인지 [출처 번호]를 명시하세요.
-4. 한국어로 친절하고 명확하게 답변하세요.
-5. 가능한 한 자세하고 구체적으로 설명하세요. 예시와 세부사항을 포함하세요.
-6. 각 주요 포인트를 충분히 설명하고, 필요하다면 여러 문단으로 나누어 작성하세요. 
-7. 컨텍스트에 답이 없다면 솔직히 "제공된 문서에서 관련 정보를 찾을 수 없습니다"라고 말하세요."""),
-        ("user", """컨텍스트:
-{context}
+    # 출처 정보 추출
+    sources = _build_sources(documents)
 
-질문: {question}
+    # 컨텍스트 구성
+    context = _build_context(documents)
+
+    # LLM 호출 (템플릿/클라이언트는 모듈 수준에서 재사용)
+    chain = _PROMPT | _get_llm(model_name)
 
-답변:""")
-    ])
-    
-    # LLM 호출
-    llm = ChatOpenAI(model=model_name, temperature=0)
-    chain = prompt_template | llm
-    
     response = chain.invoke({
         "context": context,
         "question": question
@@ -260,5 +357,52 @@ def answer_question(
     
     # 3. 통계 추가
     result['knowledge_stats'] = knowledge_stats
-    
-    return result
\ No newline at end of file
+
+    return result
+
+
+def stream_answer(
+    knowledge_names: List[str],
+    question: str,
+    top_k_per_knowledge: int = 3,
+    final_top_k: int = 5,
+    use_reasoning_model: bool = False
+):
+    """
+    RAG 스트리밍 파이프라인: 답변 토큰을 생성되는 즉시 yield
+
+    answer_question과 같은 검색/프롬프트 경로를 쓰되 chain.stream으로
+    토큰을 흘려보내 전체 생성이 끝날 때까지 기다리지 않음
+    (GPT-4 답변은 수십 초가 걸릴 수 있어 첫 토큰까지의 지연이 중요)
+
+    Yields:
+        {'type': 'delta', 'content': 토큰}  - 답변 조각
+        {'type': 'meta', 'sources': [...], 'knowledge_stats': {...}}  - 마지막 1회
+    """
+    model_name = "gpt-4" if use_reasoning_model else "gpt-4o-mini"
+
+    documents, knowledge_stats = retrieve_documents(
+        knowledge_names=knowledge_names,
+        question=question,
+        top_k_per_knowledge=top_k_per_knowledge,
+        final_top_k=final_top_k
+    )
+
+    if not documents:
+        yield {'type': 'delta', 'content': "죄송합니다. 관련된 정보를 찾을 수 없습니다."}
+        yield {'type': 'meta', 'sources': [], 'knowledge_stats': knowledge_stats}
+        return
+
+    sources = _build_sources(documents)
+    context = _build_context(documents)
+
+    chain = _PROMPT | _get_llm(model_name)
+
+    for chunk in chain.stream({
+        "context": context,
+        "question": question
+    }):
+        if chunk.content:
+            yield {'type': 'delta', 'content': chunk.content}
+
+    yield {'type': 'meta', 'sources': sources, 'knowledge_stats': knowledge_stats}
\ No newline at end of file
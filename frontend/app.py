@@ -1,7 +1,35 @@
 """
 Streamlit 메인 앱 - 로그인 페이지
 """
+import os
+
+import requests
 import streamlit as st
+from dotenv import load_dotenv
+
+
+@st.cache_resource
+def _get_config() -> str:
+    """환경 설정 로드 (매 rerun마다 .env 재파싱 방지)"""
+    load_dotenv()
+    return os.getenv("API_BASE_URL", "http://localhost:8000")
+
+
+@st.cache_resource
+def _get_session() -> requests.Session:
+    """공용 HTTP 세션 (TCP 연결 재사용)"""
+    return requests.Session()
+
+
+@st.cache_data(ttl=10)
+def _backend_health(api_base_url: str) -> bool:
+    """백엔드 health 체크 (10초 캐시 - 위젯 클릭마다 블로킹 방지)"""
+    try:
+        response = _get_session().get(f"{api_base_url}/health", timeout=2)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
 
 st.set_page_config(
     page_title="RAG 지식 기반 시스템",
@@ -85,19 +113,8 @@ else:
     # 시스템 상태
     st.subheader("⚙️ 시스템 상태")
     
-    import requests
-    import os
-    from dotenv import load_dotenv
-    
-    load_dotenv()
-    API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
-    
-    try:
-        health_response = requests.get(f"{API_BASE_URL}/health", timeout=2)
-        if health_response.status_code == 200:
-            st.success("✅ Backend 서버 정상 작동 중")
-        else:
-            st.error("❌ Backend 서버 응답 오류")
-    except:
+    if _backend_health(_get_config()):
+        st.success("✅ Backend 서버 정상 작동 중")
+    else:
         st.error("❌ Backend 서버에 연결할 수 없습니다.")
         st.caption("Backend 서버를 먼저 실행해주세요: `cd backend && python main.py`")
\ No newline at end of file
@@ -1,15 +1,428 @@
 """
 관리자 페이지 - 신규 지식 등록
 """
+import asyncio
+import gzip
+import json
+
 import streamlit as st
 import requests
+import aiohttp
 import pandas as pd
+import pyarrow as pa
+import base64
+import io
 import os
+import time
+from requests.adapters import HTTPAdapter, Retry
 from dotenv import load_dotenv
 
 load_dotenv()
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# 공용 HTTP 세션: keep-alive로 호출마다 TCP 연결을 새로 맺지 않음
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# 엔드포인트 성격별 (connect, read) 타임아웃
+# 타임아웃이 없으면 백엔드가 멈췄을 때 spinner가 영원히 돌게 됨
+TIMEOUT_FAST = (5, 30)      # 목록/메타데이터/CSV 저장 등 가벼운 호출
+TIMEOUT_EXTRACT = (10, 300)  # PDF 업로드/표 추출
+TIMEOUT_EMBED = (10, 600)    # 임베딩 시작
+
+
+@st.cache_data(ttl=15, show_spinner=False)
+def _list_files(knowledge: str) -> dict:
+    """파일 목록 조회 (rerun마다 API를 다시 치지 않도록 15초 캐시)"""
+    r = SESSION.get(
+        f"{API_BASE_URL}/api/admin/list-files/{knowledge}",
+        timeout=TIMEOUT_FAST
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _get_page_images(knowledge: str, pdf: str, pages: tuple) -> dict:
+    """
+    현재 페이지에 보이는 표들의 썸네일 PNG를 한 번에 동시 조회
+
+    표마다 순차 GET을 보내면 서버 측 페이지 렌더링에 막혀
+    10개 기준 10 RTT가 걸리므로 aiohttp로 동시에 요청
+    (같은 화면 구성은 st.cache_data로 재다운로드 방지)
+
+    Returns:
+        {페이지 번호: PNG bytes}
+    """
+    async def _fetch_all():
+        timeout = aiohttp.ClientTimeout(
+            connect=TIMEOUT_FAST[0], total=TIMEOUT_FAST[1]
+        )
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async def one(page):
+                url = f"{API_BASE_URL}/api/admin/get-pdf-page-image/{knowledge}/{pdf}/{page}"
+                async with session.get(url) as r:
+                    r.raise_for_status()
+                    return page, await r.read()
+
+            return dict(await asyncio.gather(*(one(p) for p in pages)))
+
+    return asyncio.run(_fetch_all())
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_knowledge() -> list:
+    """지식 목록 조회 (30초 캐시)"""
+    r = SESSION.get(
+        f"{API_BASE_URL}/api/admin/list-knowledge",
+        timeout=TIMEOUT_FAST
+    )
+    r.raise_for_status()
+    return r.json()['knowledge_list']
+
+
+def run_embedding(knowledge_name: str, force_recreate: bool) -> dict:
+    """
+    임베딩 시작 후 완료까지 상태 폴링
+    (백엔드는 백그라운드로 실행하고 즉시 반환함)
+
+    Returns:
+        작업 상태 dict ({status, result/error, ...})
+    """
+    start_response = SESSION.post(
+        f"{API_BASE_URL}/api/admin/start-embedding",
+        params={
+            "knowledge_name": knowledge_name,
+            "force_recreate": force_recreate
+        },
+        timeout=TIMEOUT_EMBED
+    )
+    start_response.raise_for_status()
+
+    # 완료/실패까지 2초 간격 폴링
+    while True:
+        status_response = SESSION.get(
+            f"{API_BASE_URL}/api/admin/embedding-status/{knowledge_name}",
+            timeout=TIMEOUT_FAST
+        )
+        status_response.raise_for_status()
+        job = status_response.json()
+
+        if job.get('status') != 'running':
+            # 임베딩이 파일 목록/지식 통계를 바꿨을 수 있으므로 캐시 무효화
+            _list_files.clear()
+            _list_knowledge.clear()
+            return job
+
+        time.sleep(2)
+
+
+def _df_to_arrow_b64(df: pd.DataFrame) -> str:
+    """
+    DataFrame을 Arrow IPC 스트림으로 직렬화
+
+    values.tolist() + JSON은 셀마다 파이썬 객체를 거치지만
+    Arrow IPC는 컬럼 버퍼를 C 레벨에서 통째로 인코딩함
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue()).decode('ascii')
+
+
+def _is_empty(df) -> bool:
+    """저장 불가능한 DataFrame 판정 (shape 조회는 .columns 생성보다 저렴)"""
+    return df is None or df.empty or df.shape[1] == 0
+
+
+def _collect_selected() -> tuple:
+    """
+    선택된 표들을 한 번의 순회로 수집 및 검증
+
+    검증 루프와 전송 루프가 따로 돌면서 같은 session_state 키를
+    두 번씩 읽던 것을 단일 패스로 줄임
+
+    Returns:
+        (items, missing_desc, empty_data)
+        items는 (table, desc, edited_df) 튜플 리스트
+    """
+    items = []
+    missing_desc = []
+    empty_data = []
+
+    for tid in sorted(st.session_state['selected_tables']):
+        table = st.session_state['tables_by_id'][tid]
+        desc = st.session_state.get(f'table_desc_{tid}', '').strip()
+        edited_df = st.session_state.get(f'edited_df_{tid}')
+
+        if not desc:
+            missing_desc.append(f"표{table['table_index']}")
+
+        # 빈 데이터 체크
+        if _is_empty(edited_df):
+            empty_data.append(f"표{table['table_index']}")
+
+        items.append((table, desc, edited_df))
+
+    return items, missing_desc, empty_data
+
+
+def save_selected_tables(current_knowledge: str, items: list) -> int:
+    """
+    수집된 표들을 한 번의 일괄 저장 호출로 CSV 저장
+
+    표마다 POST를 보내면 N번의 HTTP/JSON 왕복이 생기므로
+    모든 표를 save-tables-bulk 요청 하나에 담아 전송
+
+    Args:
+        items: _collect_selected()가 반환한 (table, desc, edited_df) 리스트
+
+    Returns:
+        저장 성공한 표 개수
+    """
+    tables_payload = []
+    for table, desc, edited_df in items:
+        tables_payload.append({
+            "page": table['page'],
+            "table_index": table['table_index'],
+            "description": desc,
+            "arrow_b64": _df_to_arrow_b64(edited_df)
+        })
+
+    if not tables_payload:
+        return 0
+
+    # 표 데이터는 텍스트 반복이 많아 gzip으로 5~10배 줄어듦
+    # (느린 관리자 회선에서 업로드 시간이 본문 크기에 비례)
+    body = gzip.compress(json.dumps({"tables": tables_payload}).encode())
+
+    save_r = SESSION.post(
+        f"{API_BASE_URL}/api/admin/save-tables-bulk",
+        params={
+            "knowledge_name": current_knowledge,
+            "pdf_filename": st.session_state['pdf_name']
+        },
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip"
+        },
+        timeout=TIMEOUT_EXTRACT
+    )
+    if save_r.status_code != 200:
+        return 0
+
+    success_count = save_r.json().get('saved_count', 0)
+    if success_count:
+        _list_files.clear()
+        _list_knowledge.clear()
+    return success_count
+
+
+def _do_save(current_knowledge: str):
+    """저장 버튼 공통 처리: 검증 → 일괄 저장 → 세션 정리"""
+    if not st.session_state['selected_tables']:
+        st.warning("저장할 표를 선택하세요")
+        return
+
+    items, missing_desc, empty_data = _collect_selected()
+
+    if missing_desc:
+        st.error(f"다음 표의 설명을 입력하세요: {', '.join(missing_desc)}")
+        st.stop()
+
+    if empty_data:
+        st.error(f"다음 표는 데이터가 비어있어 저장할 수 없습니다: {', '.join(empty_data)}")
+        st.warning("빈 표는 선택 해제하거나 삭제하세요")
+        st.stop()
+
+    success_count = save_selected_tables(current_knowledge, items)
+
+    if success_count > 0:
+        st.success(f"{success_count}개 CSV 저장 완료")
+
+        saved = st.session_state['selected_tables']
+        st.session_state['table_ids'] = [
+            t for t in st.session_state['table_ids'] if t not in saved
+        ]
+        for tid in saved:
+            st.session_state['tables_by_id'].pop(tid, None)
+            st.session_state.pop(f'base_df_{tid}', None)
+
+        st.session_state['selected_tables'] = set()
+
+        if not st.session_state['table_ids']:
+            del st.session_state['table_ids']
+            del st.session_state['tables_by_id']
+            del st.session_state['pdf_name']
+
+        st.rerun()
+
+
+def _toggle_table(tid: int):
+    """
+    표 선택 체크박스 on_change 콜백
+
+    rerun마다 체크 상태를 읽어 add/discard 하던 방식은
+    select_all 로직과 서로 상태를 덮어쓰는 문제가 있었음
+    콜백은 사용자가 실제로 토글한 순간에만 호출됨
+    """
+    s = st.session_state['selected_tables']
+    (s.add if st.session_state[f'check_{tid}'] else s.discard)(tid)
+
+
+_ITEMS_PER_PAGE = 10
+
+
+def _select_all_changed():
+    """
+    전체선택 체크박스 on_change 콜백 (현재 페이지만)
+
+    위젯 키가 session_state에 생긴 뒤에는 value= 인자가 무시되므로
+    선택 집합만 갱신하면 행 체크박스 표시가 실제 선택과 어긋남 -
+    행별 check_{tid} 위젯 상태까지 함께 써줘야 함
+    """
+    checked = st.session_state['select_all_checkbox']
+    start_idx = st.session_state['current_page'] * _ITEMS_PER_PAGE
+    page_ids = st.session_state['table_ids'][start_idx:start_idx + _ITEMS_PER_PAGE]
+
+    s = st.session_state['selected_tables']
+    for tid in page_ids:
+        (s.add if checked else s.discard)(tid)
+        st.session_state[f'check_{tid}'] = checked
+
+
+def _do_delete():
+    """삭제 버튼 공통 처리: 선택된 표와 관련 세션 키 제거"""
+    selected = st.session_state['selected_tables']
+    if not selected:
+        st.warning("삭제할 표를 선택하세요")
+        return
+
+    # id 기반이라 삭제해도 남은 표들의 위젯 키가 밀리지 않음
+    st.session_state['table_ids'] = [
+        t for t in st.session_state['table_ids'] if t not in selected
+    ]
+    for tid in selected:
+        st.session_state['tables_by_id'].pop(tid, None)
+        st.session_state.pop(f'base_df_{tid}', None)
+
+    deleted_count = len(selected)
+    st.session_state['selected_tables'] = set()
+    st.success(f"{deleted_count}개 표 삭제")
+    st.rerun()
+
+
+def _pagination(prefix: str, total_pages: int):
+    """이전/다음 페이지 컨트롤 (상단/하단에서 prefix만 달리해 재사용)"""
+    col_prev, col_page_info, col_next = st.columns([1, 2, 1])
+
+    with col_prev:
+        if st.button("이전 페이지", key=f"prev_{prefix}", disabled=(st.session_state['current_page'] == 0), use_container_width=True):
+            st.session_state['current_page'] -= 1
+            st.rerun()
+
+    with col_page_info:
+        st.markdown(f"<div style='text-align: center; padding: 8px;'>페이지 {st.session_state['current_page'] + 1} / {total_pages}</div>", unsafe_allow_html=True)
+
+    with col_next:
+        if st.button("다음 페이지", key=f"next_{prefix}", disabled=(st.session_state['current_page'] >= total_pages - 1), use_container_width=True):
+            st.session_state['current_page'] += 1
+            st.rerun()
+
+
+def _reset_table_state():
+    """
+    새 추출 결과를 받기 전에 이전 PDF의 표 관련 세션 상태 일괄 제거
+
+    표 id가 PDF마다 0부터 다시 시작하므로 이전 PDF의 base_df_0,
+    edited_df_0 등이 남아 있으면 다음 PDF의 0번 표에 그대로 붙어
+    편집기에 엉뚱한 표가 뜨거나 이전 PDF 데이터가 저장됨
+    """
+    prefixes = ('base_df_', 'edited_df_', 'table_desc_',
+                'check_', 'edit_', 'desc_')
+    for key in [k for k in st.session_state if str(k).startswith(prefixes)]:
+        del st.session_state[key]
+
+    st.session_state['selected_tables'] = set()
+    st.session_state['current_page'] = 0
+    st.session_state.pop('select_all_checkbox', None)
+
+
+def _render_table_row(tid: int, page_images: dict):
+    """
+    표 한 행(체크박스/썸네일/CSV 편집기/설명) 렌더링
+
+    행 단위 부분 rerun(@st.fragment, Streamlit 1.33+)을 쓸 수 있게
+    독립 함수로 분리해 둠 - 현재 고정 버전(1.29)에는 fragment API가
+    없어 데코레이터만 빠져 있는 상태
+    """
+    table = st.session_state['tables_by_id'][tid]
+    col_check, col_content = st.columns([0.05, 0.95])
+
+    with col_check:
+        # value=와 전체선택 콜백의 session_state 쓰기를 섞으면 1.29가
+        # 위젯마다 경고를 띄우므로 초기값은 setdefault로 한 번만 심음
+        st.session_state.setdefault(
+            f'check_{tid}', tid in st.session_state['selected_tables']
+        )
+        st.checkbox(
+            "",
+            key=f"check_{tid}",
+            on_change=_toggle_table,
+            args=(tid,)
+        )
+
+    with col_content:
+        col_left, col_right = st.columns([1, 1])
+
+        with col_left:
+            st.subheader("원본 이미지")
+            img_bytes = page_images.get(table['page'])
+            if img_bytes:
+                st.image(img_bytes, use_column_width=True)
+            else:
+                st.error("이미지 로드 실패")
+
+        with col_right:
+            st.subheader("CSV 편집")
+            if table['data'] and table['columns']:
+                # 리스트→DataFrame 변환은 rerun마다 반복하지 않고 세션에 캐시
+                base_key = f'base_df_{tid}'
+                if base_key not in st.session_state:
+                    st.session_state[base_key] = pd.DataFrame(
+                        table['data'], columns=table['columns']
+                    )
+                df = st.session_state[base_key]
+                edited = st.data_editor(
+                    df,
+                    num_rows="dynamic",
+                    key=f"edit_{tid}",
+                    height=300
+                )
+                st.session_state[f'edited_df_{tid}'] = edited
+            else:
+                st.error("데이터 없음 - 이 표는 저장할 수 없습니다")
+                st.caption("표 추출에 실패했습니다. 이 표를 삭제하거나 선택 해제하세요.")
+
+        desc = st.text_input(
+            "표 설명:",
+            key=f"desc_{tid}",
+            value=f"표설명{tid+1}",
+            placeholder="예: 지역화폐 스테이블코인 비교"
+        )
+        st.session_state[f'table_desc_{tid}'] = desc
+
+    st.markdown("---")
+
+
 st.set_page_config(
     page_title="관리자 - 신규 지식 등록",
     page_icon="📊",
@@ -60,60 +473,50 @@ if menu == "신규 지식 등록":
     # ========================================
     st.header("1. 지식명")
     
-    col1, col2 = st.columns([3, 1])
-    with col1:
+    # 이름/소개 입력을 st.form으로 묶어 타이핑 확정마다 전체 스크립트가
+    # 재실행되는 것을 막음 (제출 버튼을 눌렀을 때만 rerun 1회)
+    with st.form("knowledge_meta", clear_on_submit=False):
         knowledge_name = st.text_input(
             "지식명을 입력하세요",
             value=st.session_state.get('current_knowledge', ''),
             placeholder="예: 스테이블 코인"
         )
-    with col2:
-        if st.button("등록", type="primary", use_container_width=True):
-            if knowledge_name:
-                st.session_state['current_knowledge'] = knowledge_name
-                st.success(f"지식명 설정: {knowledge_name}")
-                st.rerun()
-            else:
-                st.warning("지식명을 입력하세요")
-    
-    if st.session_state['current_knowledge']:
-        st.info(f"현재 지식: **{st.session_state['current_knowledge']}**")
-    
-    col_desc1, col_desc2 = st.columns([1, 3])
-    with col_desc1:
-        st.markdown("**간략 소개:**")
-    with col_desc2:
         knowledge_desc = st.text_area(
             "간략 소개",
-            label_visibility="collapsed",
             value=st.session_state.get('current_description', ''),
-            placeholder="간략 소개 글은 사용자 화면에서 해당 지식을 선택할때 보여지는 내용이니 유의하여 등록하시기 바랍니다",
-            key="knowledge_description"
+            placeholder="간략 소개 글은 사용자 화면에서 해당 지식을 선택할때 보여지는 내용이니 유의하여 등록하시기 바랍니다"
         )
-        
-        # 간략 소개 저장 버튼
-        if st.button("간략 소개 저장", use_container_width=True):
-            if st.session_state['current_knowledge'] and knowledge_desc.strip():
+        submitted = st.form_submit_button("등록", type="primary", use_container_width=True)
+
+    if submitted:
+        if not knowledge_name:
+            st.warning("지식명을 입력하세요")
+        else:
+            st.session_state['current_knowledge'] = knowledge_name
+
+            # 소개가 입력돼 있으면 등록과 함께 한 번의 호출로 저장
+            # (기존의 '등록'/'간략 소개 저장' 버튼 2개와 왕복 2회를 하나로 합침)
+            if knowledge_desc.strip():
                 try:
-                    # 간략 소개 저장 API 호출
-                    save_desc_response = requests.post(
+                    save_desc_response = SESSION.post(
                         f"{API_BASE_URL}/api/admin/save-knowledge-metadata",
                         json={
-                            "knowledge_name": st.session_state['current_knowledge'],
+                            "knowledge_name": knowledge_name,
                             "description": knowledge_desc.strip()
-                        }
+                        },
+                        timeout=TIMEOUT_FAST
                     )
                     if save_desc_response.status_code == 200:
                         st.session_state['current_description'] = knowledge_desc.strip()
-                        st.success("간략 소개가 저장되었습니다")
                     else:
                         st.error("간략 소개 저장 실패")
-                except:
-                    st.error("간략 소개 저장 중 오류 발생")
-            elif not st.session_state['current_knowledge']:
-                st.warning("먼저 지식명을 등록하세요")
-            else:
-                st.warning("간략 소개를 입력하세요")
+                except requests.RequestException as e:
+                    st.error(f"간략 소개 저장 중 오류 발생: {e}")
+
+            st.rerun()
+
+    if st.session_state['current_knowledge']:
+        st.info(f"현재 지식: **{st.session_state['current_knowledge']}**")
     
     if not st.session_state['current_knowledge']:
         st.warning("먼저 지식명을 등록하세요")
@@ -137,46 +540,63 @@ if menu == "신규 지식 등록":
     if uploaded_file:
         if st.button("표 추출 시작", type="primary"):
             with st.spinner("PDF 업로드 및 표 추출 중..."):
-                files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
-                upload_response = requests.post(
-                    f"{API_BASE_URL}/api/admin/upload-pdf",
-                    params={"knowledge_name": current_knowledge},
-                    files=files
-                )
-                
-                if upload_response.status_code == 200:
-                    extract_response = requests.post(
-                        f"{API_BASE_URL}/api/admin/extract-tables",
+                # 파일 객체를 그대로 넘겨 스트리밍 전송
+                # (getvalue()로 전체 바이트를 복사하면 대용량 PDF에서 메모리가 2배로 듦)
+                uploaded_file.seek(0)
+                # 업로드와 표 추출을 서버에서 연달아 처리 (왕복 1회 절감)
+                try:
+                    response = SESSION.post(
+                        f"{API_BASE_URL}/api/admin/upload-and-extract",
                         params={
                             "knowledge_name": current_knowledge,
                             "pdf_filename": uploaded_file.name
-                        }
+                        },
+                        data=uploaded_file,
+                        headers={"Content-Type": "application/pdf"},
+                        timeout=TIMEOUT_EXTRACT
                     )
-                    
-                    if extract_response.status_code == 200:
-                        result = extract_response.json()
-                        st.session_state['tables'] = result['tables']
-                        st.session_state['pdf_name'] = uploaded_file.name
-                        
-                        # 수정: 표 개수에 따른 메시지
-                        if len(result['tables']) > 0:
-                            st.success(f"{len(result['tables'])}개 표 발견")
-                        else:
-                            st.warning("추출할 표가 없습니다")
-                            st.info("표가 없는 PDF는 그대로 저장되며, Phase 3에서 전체 텍스트로 임베딩됩니다")
-                        
-                        st.rerun()
+                except requests.RequestException as e:
+                    st.error(f"PDF 업로드 실패: {e}")
+                    st.stop()
+
+                if response.status_code != 200:
+                    st.error(f"표 추출 실패 ({response.status_code}): {response.text[:200]}")
+                else:
+                    _list_files.clear()
+                    _get_page_images.clear()
+                    result = response.json()
+                    # 동일 내용의 PDF가 이미 있으면 기존 파일명으로 진행
+                    saved_filename = result['filename']
+                    if result.get('duplicate'):
+                        st.info(f"동일한 내용의 PDF가 이미 등록되어 있습니다: {saved_filename}")
+
+                    # 표는 안정적인 id로 한 번만 저장
+                    # (리스트 인덱스를 키로 쓰면 삭제 시 뒤 표들의 위젯 키가 밀려
+                    #  체크박스/편집 내용이 엉뚱한 표에 붙는 문제가 있었음)
+                    _reset_table_state()
+                    st.session_state['table_ids'] = list(range(len(result['tables'])))
+                    st.session_state['tables_by_id'] = dict(enumerate(result['tables']))
+                    st.session_state['pdf_name'] = saved_filename
+
+                    # 수정: 표 개수에 따른 메시지
+                    if len(result['tables']) > 0:
+                        st.success(f"{len(result['tables'])}개 표 발견")
+                    else:
+                        st.warning("추출할 표가 없습니다")
+                        st.info("표가 없는 PDF는 그대로 저장되며, Phase 3에서 전체 텍스트로 임베딩됩니다")
+
+                    st.rerun()
     
     st.markdown("---")
     
     # ========================================
     # 3. 표 추출 및 저장/삭제
     # ========================================
-    if 'tables' in st.session_state:
+    if 'table_ids' in st.session_state:
         st.header("3. 표 추출 및 저장/삭제")
-        
+
         # 표가 없는 경우
-        if not st.session_state['tables']:
+        if not st.session_state['table_ids']:
             st.info("이 PDF에는 추출 가능한 표가 없습니다")
             st.markdown("**다음 단계:**")
             st.markdown("- 다른 PDF를 추가 업로드하거나")
@@ -186,7 +606,8 @@ if menu == "신규 지식 등록":
             if st.button("이 PDF 등록 완료", type="primary", use_container_width=True):
                 # 세션 정리 전에 파일명 저장
                 pdf_name = st.session_state['pdf_name']
-                del st.session_state['tables']
+                del st.session_state['table_ids']
+                del st.session_state['tables_by_id']
                 del st.session_state['pdf_name']
                 st.success(f"{pdf_name} 등록 완료")
                 st.rerun()
@@ -197,296 +618,84 @@ if menu == "신규 지식 등록":
             if 'selected_tables' not in st.session_state:
                 st.session_state['selected_tables'] = set()
             
-            # 페이지네이션 설정
-            items_per_page = 10
-            total_tables = len(st.session_state['tables'])
-            total_pages = (total_tables - 1) // items_per_page + 1
-            
+            # 페이지네이션 설정 (페이지 크기는 전체선택 콜백과 공유)
+            total_tables = len(st.session_state['table_ids'])
+            total_pages = (total_tables - 1) // _ITEMS_PER_PAGE + 1
+
             if 'current_page' not in st.session_state:
                 st.session_state['current_page'] = 0
-            
+
             # 페이지 범위 계산
-            start_idx = st.session_state['current_page'] * items_per_page
-            end_idx = min(start_idx + items_per_page, total_tables)
+            start_idx = st.session_state['current_page'] * _ITEMS_PER_PAGE
+            end_idx = min(start_idx + _ITEMS_PER_PAGE, total_tables)
             
             # 전체 선택 및 상단 버튼
             col_select, col_btn1, col_btn2 = st.columns([0.5, 1, 1])
             
             with col_select:
                 # 현재 페이지의 전체선택 체크박스
-                current_page_indices = set(range(start_idx, end_idx))
+                # (토글 시 콜백에서 선택 집합과 행별 체크박스를 함께 갱신)
+                current_page_indices = set(st.session_state['table_ids'][start_idx:end_idx])
                 all_current_selected = current_page_indices.issubset(st.session_state['selected_tables'])
-                select_all = st.checkbox("전체 선택", value=all_current_selected, key="select_all_checkbox")
-            
-            # 전체선택 동작 (현재 페이지만)
-            if select_all:
-                st.session_state['selected_tables'].update(current_page_indices)
-            else:
-                if all_current_selected:
-                    st.session_state['selected_tables'] -= current_page_indices
-            
-            selected_count = len(st.session_state['selected_tables'])
-            
+                st.checkbox(
+                    "전체 선택",
+                    value=all_current_selected,
+                    key="select_all_checkbox",
+                    on_change=_select_all_changed
+                )
+
             with col_btn1:
                 if st.button("선택 삭제", key="delete_top", use_container_width=True):
-                    if selected_count == 0:
-                        st.warning("삭제할 표를 선택하세요")
-                    else:
-                        for idx in sorted(st.session_state['selected_tables'], reverse=True):
-                            st.session_state['tables'].pop(idx)
-                        st.session_state['selected_tables'] = set()
-                        st.success(f"{selected_count}개 표 삭제")
-                        st.rerun()
-            
+                    _do_delete()
+
             with col_btn2:
                 if st.button("선택 CSV 저장 및 완료", key="save_top", type="primary", use_container_width=True):
-                    if selected_count == 0:
-                        st.warning("저장할 표를 선택하세요")
-                    else:
-                        # 먼저 모든 선택된 표에 설명이 있는지 체크
-                        missing_desc = []
-                        empty_data = []
-                        for idx in sorted(st.session_state['selected_tables']):
-                            table = st.session_state['tables'][idx]
-                            desc = st.session_state.get(f'table_desc_{idx}', '').strip()
-                            edited_df = st.session_state.get(f'edited_df_{idx}')
-                            
-                            if not desc:
-                                missing_desc.append(f"표{table['table_index']}")
-                            
-                            # 빈 데이터 체크
-                            if edited_df is None or edited_df.empty or len(edited_df.columns) == 0:
-                                empty_data.append(f"표{table['table_index']}")
-                        
-                        if missing_desc:
-                            st.error(f"다음 표의 설명을 입력하세요: {', '.join(missing_desc)}")
-                            st.stop()
-                        
-                        if empty_data:
-                            st.error(f"다음 표는 데이터가 비어있어 저장할 수 없습니다: {', '.join(empty_data)}")
-                            st.warning("빈 표는 선택 해제하거나 삭제하세요")
-                            st.stop()
-                        
-                        # 모든 표에 설명이 있고 데이터가 있으면 저장 진행
-                        success_count = 0
-                        for idx in sorted(st.session_state['selected_tables']):
-                            table = st.session_state['tables'][idx]
-                            desc = st.session_state.get(f'table_desc_{idx}', '').strip()
-                            edited_df = st.session_state.get(f'edited_df_{idx}')
-                            
-                            if edited_df is not None and not edited_df.empty:
-                                save_r = requests.post(
-                                    f"{API_BASE_URL}/api/admin/save-table-to-csv",
-                                    params={
-                                        "knowledge_name": current_knowledge,
-                                        "pdf_filename": st.session_state['pdf_name'],
-                                        "page": table['page'],
-                                        "table_index": table['table_index'],
-                                        "description": desc
-                                    },
-                                    json={
-                                        "data": edited_df.values.tolist(),
-                                        "columns": edited_df.columns.tolist()
-                                    }
-                                )
-                                if save_r.status_code == 200:
-                                    success_count += 1
-                        
-                        if success_count > 0:
-                            st.success(f"{success_count}개 CSV 저장 완료")
-                            
-                            for idx in sorted(st.session_state['selected_tables'], reverse=True):
-                                st.session_state['tables'].pop(idx)
-                            
-                            st.session_state['selected_tables'] = set()
-                            
-                            if not st.session_state['tables']:
-                                del st.session_state['tables']
-                                del st.session_state['pdf_name']
-                            
-                            st.rerun()
-            
+                    _do_save(current_knowledge)
+
             st.markdown("---")
-            
+
             # 페이지네이션 UI
             st.info(f"총 {total_tables}개 표 중 {start_idx + 1}-{end_idx}번째 표시 중 | 선택된 표: {len(st.session_state['selected_tables'])}개")
-            
-            col_prev, col_page_info, col_next = st.columns([1, 2, 1])
-            
-            with col_prev:
-                if st.button("이전 페이지", disabled=(st.session_state['current_page'] == 0), use_container_width=True):
-                    st.session_state['current_page'] -= 1
-                    st.rerun()
-            
-            with col_page_info:
-                st.markdown(f"<div style='text-align: center; padding: 8px;'>페이지 {st.session_state['current_page'] + 1} / {total_pages}</div>", unsafe_allow_html=True)
-            
-            with col_next:
-                if st.button("다음 페이지", disabled=(st.session_state['current_page'] >= total_pages - 1), use_container_width=True):
-                    st.session_state['current_page'] += 1
-                    st.rerun()
-            
+
+            _pagination("top", total_pages)
+
             st.markdown("---")
             
-            # 현재 페이지의 표만 표시
-            for i in range(start_idx, end_idx):
-                table = st.session_state['tables'][i]
-                col_check, col_content = st.columns([0.05, 0.95])
-                
-                with col_check:
-                    checked = st.checkbox(
-                        "",
-                        key=f"check_{i}",
-                        value=(i in st.session_state['selected_tables'])
-                    )
-                    if checked:
-                        st.session_state['selected_tables'].add(i)
-                    elif i in st.session_state['selected_tables']:
-                        st.session_state['selected_tables'].discard(i)
-                
-                with col_content:
-                    col_left, col_right = st.columns([1, 1])
-                    
-                    with col_left:
-                        st.subheader("원본 이미지")
-                        try:
-                            img_r = requests.get(
-                                f"{API_BASE_URL}/api/admin/get-pdf-page-image/"
-                                f"{current_knowledge}/{st.session_state['pdf_name']}/{table['page']}"
-                            )
-                            if img_r.status_code == 200:
-                                st.markdown(
-                                    f'<img src="data:image/png;base64,{img_r.json()["image_base64"]}" '
-                                    f'style="width:100%; border:1px solid #ddd;">',
-                                    unsafe_allow_html=True
-                                )
-                        except:
-                            st.error("이미지 로드 실패")
-                    
-                    with col_right:
-                        st.subheader("CSV 편집")
-                        if table['data'] and table['columns']:
-                            df = pd.DataFrame(table['data'], columns=table['columns'])
-                            edited = st.data_editor(
-                                df,
-                                num_rows="dynamic",
-                                key=f"edit_{i}",
-                                height=300
-                            )
-                            st.session_state[f'edited_df_{i}'] = edited
-                        else:
-                            st.error("데이터 없음 - 이 표는 저장할 수 없습니다")
-                            st.caption("표 추출에 실패했습니다. 이 표를 삭제하거나 선택 해제하세요.")
-                    
-                    desc = st.text_input(
-                        "표 설명:",
-                        key=f"desc_{i}",
-                        value=f"표설명{i+1}",
-                        placeholder="예: 지역화폐 스테이블코인 비교"
-                    )
-                    st.session_state[f'table_desc_{i}'] = desc
-                
-                st.markdown("---")
-            
-            # 하단 페이지네이션 (동일)
-            col_prev2, col_page_info2, col_next2 = st.columns([1, 2, 1])
-            
-            with col_prev2:
-                if st.button("이전", key="prev_bottom", disabled=(st.session_state['current_page'] == 0), use_container_width=True):
-                    st.session_state['current_page'] -= 1
-                    st.rerun()
-            
-            with col_page_info2:
-                st.markdown(f"<div style='text-align: center; padding: 8px;'>페이지 {st.session_state['current_page'] + 1} / {total_pages}</div>", unsafe_allow_html=True)
-            
-            with col_next2:
-                if st.button("다음", key="next_bottom", disabled=(st.session_state['current_page'] >= total_pages - 1), use_container_width=True):
-                    st.session_state['current_page'] += 1
-                    st.rerun()
-            
+            # 보이는 표들의 썸네일을 렌더링 전에 한 번에 동시 조회
+            visible_ids = st.session_state['table_ids'][start_idx:end_idx]
+            visible_pages = tuple(sorted({
+                st.session_state['tables_by_id'][t]['page'] for t in visible_ids
+            }))
+            try:
+                page_images = _get_page_images(
+                    current_knowledge,
+                    st.session_state['pdf_name'],
+                    visible_pages
+                ) if visible_pages else {}
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # ClientTimeout 초과는 asyncio.TimeoutError로 올라옴
+                # (ClientError의 하위 클래스가 아님)
+                page_images = {}
+
+            # 현재 페이지의 표만 표시 (위젯 키는 리스트 위치가 아닌 안정적인 id 기준)
+            for tid in visible_ids:
+                _render_table_row(tid, page_images)
+
+            # 하단 페이지네이션 (상단과 동일한 컨트롤 재사용)
+            _pagination("bottom", total_pages)
+
             st.markdown("---")
-            
+
             # 하단 버튼
             col_btn1, col_btn2 = st.columns(2)
-            
+
             with col_btn1:
                 if st.button("선택 삭제", key="delete_bottom", use_container_width=True):
-                    if selected_count == 0:
-                        st.warning("삭제할 표를 선택하세요")
-                    else:
-                        for idx in sorted(st.session_state['selected_tables'], reverse=True):
-                            st.session_state['tables'].pop(idx)
-                        st.session_state['selected_tables'] = set()
-                        st.success(f"{selected_count}개 표 삭제")
-                        st.rerun()
-            
+                    _do_delete()
+
             with col_btn2:
                 if st.button("선택 CSV 저장 및 완료", key="save_bottom", type="primary", use_container_width=True):
-                    if selected_count == 0:
-                        st.warning("저장할 표를 선택하세요")
-                    else:
-                        # 먼저 모든 선택된 표에 설명이 있는지 체크
-                        missing_desc = []
-                        empty_data = []
-                        for idx in sorted(st.session_state['selected_tables']):
-                            table = st.session_state['tables'][idx]
-                            desc = st.session_state.get(f'table_desc_{idx}', '').strip()
-                            edited_df = st.session_state.get(f'edited_df_{idx}')
-                            
-                            if not desc:
-                                missing_desc.append(f"표{table['table_index']}")
-                            
-                            # 빈 데이터 체크
-                            if edited_df is None or edited_df.empty or len(edited_df.columns) == 0:
-                                empty_data.append(f"표{table['table_index']}")
-                        
-                        if missing_desc:
-                            st.error(f"다음 표의 설명을 입력하세요: {', '.join(missing_desc)}")
-                            st.stop()
-                        
-                        if empty_data:
-                            st.error(f"다음 표는 데이터가 비어있어 저장할 수 없습니다: {', '.join(empty_data)}")
-                            st.warning("빈 표는 선택 해제하거나 삭제하세요")
-                            st.stop()
-                        
-                        # 모든 표에 설명이 있고 데이터가 있으면 저장 진행
-                        success_count = 0
-                        for idx in sorted(st.session_state['selected_tables']):
-                            table = st.session_state['tables'][idx]
-                            desc = st.session_state.get(f'table_desc_{idx}', '').strip()
-                            edited_df = st.session_state.get(f'edited_df_{idx}')
-                            
-                            if edited_df is not None and not edited_df.empty:
-                                save_r = requests.post(
-                                    f"{API_BASE_URL}/api/admin/save-table-to-csv",
-                                    params={
-                                        "knowledge_name": current_knowledge,
-                                        "pdf_filename": st.session_state['pdf_name'],
-                                        "page": table['page'],
-                                        "table_index": table['table_index'],
-                                        "description": desc
-                                    },
-                                    json={
-                                        "data": edited_df.values.tolist(),
-                                        "columns": edited_df.columns.tolist()
-                                    }
-                                )
-                                if save_r.status_code == 200:
-                                    success_count += 1
-                        
-                        if success_count > 0:
-                            st.success(f"{success_count}개 CSV 저장 완료")
-                            
-                            for idx in sorted(st.session_state['selected_tables'], reverse=True):
-                                st.session_state['tables'].pop(idx)
-                            
-                            st.session_state['selected_tables'] = set()
-                            
-                            if not st.session_state['tables']:
-                                del st.session_state['tables']
-                                del st.session_state['pdf_name']
-                            
-                            st.rerun()
+                    _do_save(current_knowledge)
             
             # 경고 문구
             st.markdown(
@@ -502,12 +711,9 @@ if menu == "신규 지식 등록":
     st.header("4. 등록된 PDF 및 CSV 목록")
     
     try:
-        files_response = requests.get(
-            f"{API_BASE_URL}/api/admin/list-files/{current_knowledge}"
-        )
-        
-        if files_response.status_code == 200:
-            files_data = files_response.json()
+        files_data = _list_files(current_knowledge)
+
+        if files_data is not None:
             pdfs = files_data['pdfs']
             csvs = files_data['csvs']
             
@@ -550,16 +756,10 @@ if menu == "신규 지식 등록":
                             
                             with st.spinner("임베딩 진행 중... (수 분 소요될 수 있습니다)"):
                                 try:
-                                    response = requests.post(
-                                        f"{API_BASE_URL}/api/admin/start-embedding",
-                                        params={
-                                            "knowledge_name": current_knowledge,
-                                            "force_recreate": False
-                                        }
-                                    )
-                                    
-                                    if response.status_code == 200:
-                                        result = response.json()
+                                    job = run_embedding(current_knowledge, force_recreate=False)
+
+                                    if job.get('status') == 'done':
+                                        result = job['result']
                                         mode = result.get('mode', 'unknown')
                                         new_chunks = result.get('new_chunks', 0)
                                         
@@ -576,7 +776,7 @@ if menu == "신규 지식 등록":
                                         if new_chunks > 0:
                                             st.write(f"- 새로 추가된 청크: {new_chunks}개")
                                     else:
-                                        st.error(f"임베딩 실패: {response.text}")
+                                        st.error(f"임베딩 실패: {job.get('error', job)}")
                                 except Exception as e:
                                     st.error(f"임베딩 중 오류: {str(e)}")
                     with col_confirm2:
@@ -585,8 +785,8 @@ if menu == "신규 지식 등록":
                             st.rerun()
             else:
                 st.info("등록된 파일이 없습니다. 위에서 PDF를 업로드하세요.")
-    except:
-        st.error("파일 목록 조회 실패")
+    except requests.RequestException as e:
+        st.error(f"파일 목록 조회 실패: {e}")
 
 # ========================================
 # 등록된 지식 관리
@@ -595,9 +795,8 @@ elif menu == "등록된 지식 관리":
     st.title("등록된 지식 관리")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/api/admin/list-knowledge")
-        if response.status_code == 200:
-            knowledge_list = response.json()['knowledge_list']
+        knowledge_list = _list_knowledge()
+        if knowledge_list is not None:
             
             if knowledge_list:
                 for knowledge in knowledge_list:
@@ -611,28 +810,31 @@ elif menu == "등록된 지식 관리":
                                 st.caption(f"설명: {knowledge['description']}")
                         
                         with col2:
-                            # 임베딩 상태 확인
-                            chroma_path = f"document_sets/{knowledge['name']}/chroma_db"
-                            if os.path.exists(chroma_path):
+                            # 임베딩 상태는 API 응답에 포함되어 옴
+                            # (프론트에서 백엔드 디스크 경로를 직접 확인하면
+                            #  컨테이너 분리 배포 시 항상 False가 됨)
+                            if knowledge.get('embedded'):
                                 st.success("임베딩 완료")
                             else:
                                 st.warning("임베딩 필요")
                         
                         st.markdown("---")
                         
-                        # 파일 목록 보기
+                        # 파일 목록 보기 (버튼을 누른 지식만 list-files를 호출)
+                        # 목록 자체는 플래그로 유지해 다음 rerun에도 계속 보임
+                        show_key = f"show_files_{knowledge['name']}"
                         if st.button(f"파일 목록 보기", key=f"view_{knowledge['name']}"):
-                            files_response = requests.get(
-                                f"{API_BASE_URL}/api/admin/list-files/{knowledge['name']}"
-                            )
-                            
-                            if files_response.status_code == 200:
-                                files_data = files_response.json()
-                                
+                            st.session_state[show_key] = not st.session_state.get(show_key, False)
+
+                        if st.session_state.get(show_key):
+                            files_data = _list_files(knowledge['name'])
+
+                            if files_data is not None:
+
                                 st.write("**PDF 파일:**")
                                 for pdf in files_data['pdfs']:
                                     st.write(f"  - {pdf['filename']}")
-                                
+
                                 st.write("**CSV 파일:**")
                                 for csv in files_data['csvs']:
                                     st.write(f"  - {csv['filename']}")
@@ -663,16 +865,10 @@ elif menu == "등록된 지식 관리":
                             if st.button(f"임베딩 시작", key=f"embed_{knowledge['name']}", use_container_width=True, type="primary"):
                                 with st.spinner("임베딩 진행 중..."):
                                     try:
-                                        embed_response = requests.post(
-                                            f"{API_BASE_URL}/api/admin/start-embedding",
-                                            params={
-                                                "knowledge_name": knowledge['name'],
-                                                "force_recreate": force_recreate
-                                            }
-                                        )
-                                        
-                                        if embed_response.status_code == 200:
-                                            result = embed_response.json()
+                                        job = run_embedding(knowledge['name'], force_recreate)
+
+                                        if job.get('status') == 'done':
+                                            result = job['result']
                                             mode = result.get('mode', 'unknown')
                                             new_chunks = result.get('new_chunks', 0)
                                             
@@ -687,7 +883,7 @@ elif menu == "등록된 지식 관리":
                                             if new_chunks > 0:
                                                 st.write(f"새로 추가된 청크: {new_chunks}개")
                                         else:
-                                            st.error(f"임베딩 실패: {embed_response.text}")
+                                            st.error(f"임베딩 실패: {job.get('error', job)}")
                                     except Exception as e:
                                         st.error(f"오류: {str(e)}")
                         
@@ -3,8 +3,13 @@ RAG 채팅 인터페이스
 사용자가 지식베이스를 선택하고 질문할 수 있는 페이지
 """
 
+import time
+from collections import deque
+
+import orjson
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from typing import List, Dict, Any
 
 
@@ -19,110 +24,240 @@ st.set_page_config(
 API_BASE_URL = "http://localhost:8000"
 
 
-def get_available_knowledge() -> List[Dict[str, str]]:
-    """임베딩이 완료된 지식베이스 목록 가져오기"""
+@st.cache_resource
+def _http() -> requests.Session:
+    """
+    공용 HTTP 세션 (keep-alive 연결 풀)
+
+    매 호출마다 requests.get/post를 쓰면 TCP 연결과 어댑터를
+    새로 만들게 되므로 cache_resource로 세션을 프로세스 수명 동안 재사용
+    """
+    s = requests.Session()
+    # 게이트웨이 일시 오류(502/503/504)는 백오프 재시도 - POST도 포함하지만
+    # 해당 상태코드는 백엔드에 닿기 전 실패라 중복 처리 위험 없음
+    retry = Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "POST"]
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_available_knowledge() -> List[Dict[str, str]]:
+    """
+    임베딩이 완료된 지식베이스 목록 가져오기 (60초 캐시)
+
+    Streamlit은 슬라이더/체크박스 조작마다 스크립트 전체를 재실행하므로
+    rerun마다 백엔드 왕복이 생기지 않도록 캐시
+    """
     try:
-        response = requests.get(f"{API_BASE_URL}/api/user/available-knowledge")
+        response = _http().get(
+            f"{API_BASE_URL}/api/user/available-knowledge",
+            timeout=(3, 5)
+        )
         response.raise_for_status()
-        return response.json()
+        # stdlib json보다 수 배 빠른 orjson으로 파싱 (UI 스레드 점유 감소)
+        return orjson.loads(response.content)
     except Exception as e:
         st.error(f"지식 목록을 불러올 수 없습니다: {str(e)}")
         return []
 
 
-def ask_question(
+def ask_question_stream(
     knowledge_names: List[str],
     question: str,
     top_k_per_knowledge: int = 3,
     final_top_k: int = 5,
     use_reasoning_model: bool = False
-) -> Dict[str, Any]:
-    """질문하고 답변 받기"""
-    try:
-        response = requests.post(
-            f"{API_BASE_URL}/api/user/ask",
-            json={
-                "knowledge_names": knowledge_names,
-                "question": question,
-                "top_k_per_knowledge": top_k_per_knowledge,
-                "final_top_k": final_top_k,
-                "use_reasoning_model": use_reasoning_model
-            }
-        )
+):
+    """
+    질문을 스트리밍으로 보내고 답변 델타를 yield
+
+    기존 블로킹 POST는 전체 답변이 완성될 때까지 스피너만 보였지만
+    SSE 스트림은 첫 토큰부터 바로 화면에 표시할 수 있음
+    출처/통계가 담긴 meta 이벤트는 st.session_state['_last_meta']에 보관
+    """
+    st.session_state['_last_meta'] = {}
+
+    with _http().post(
+        f"{API_BASE_URL}/api/user/ask/stream",
+        json={
+            "knowledge_names": knowledge_names,
+            "question": question,
+            "top_k_per_knowledge": top_k_per_knowledge,
+            "final_top_k": final_top_k,
+            "use_reasoning_model": use_reasoning_model
+        },
+        stream=True,
+        timeout=(3, 120)
+    ) as response:
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPException as e:
-        st.error(f"API 오류: {e.response.text if hasattr(e, 'response') else str(e)}")
-        return None
-    except Exception as e:
-        st.error(f"질문 처리 중 오류 발생: {str(e)}")
-        return None
 
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+
+            event = orjson.loads(line[len("data: "):])
+            event_type = event.get('type')
+
+            if event_type == 'delta':
+                yield event['content']
+            elif event_type == 'meta':
+                st.session_state['_last_meta'] = event
+            elif event_type == 'error':
+                raise RuntimeError(event.get('detail', '스트리밍 오류'))
+
+
+def _coalesce(token_iter, interval: float = 0.05):
+    """
+    스트림 토큰을 약 50ms 단위로 묶어서 yield
+
+    토큰마다 화면을 갱신하면 긴 답변에서 렌더링 스레드가 포화되므로
+    (렌더 횟수가 O(토큰 수)) 버퍼에 모아 초당 약 20회만 flush
+    """
+    buf = []
+    last = time.monotonic()
+
+    for token in token_iter:
+        buf.append(token)
+        now = time.monotonic()
+        if now - last >= interval:
+            yield "".join(buf)
+            buf.clear()
+            last = now
+
+    if buf:
+        yield "".join(buf)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _sources_markdown(sources: List[Dict[str, Any]]) -> str:
+    """출처 목록 마크다운 조립 (내용이 같으면 rerun 간 문자열 재사용)"""
+    lines = ["---", "### 📚 참고 출처"]
 
-def display_sources(sources: List[Dict[str, Any]]):
-    """출처 정보 표시"""
-    st.markdown("---")
-    st.subheader("📚 참고 출처")
-    
     for source in sources:
-        st.markdown(f"**출처 {source['index']}: {source['knowledge_name']} - {source['source_file']}**")
-
-        cols = st.columns([1, 1, 2])
-        
-        with cols[0]:
-            st.write(f"**페이지:** {source['page']}")
-        
-        with cols[1]:
-            score = source.get('score', 0)
-            st.write(f"**유사도:** {score:.4f}")
-        
-        with cols[2]:
-            st.write(f"**지식:** {source['knowledge_name']}")
-        
-        st.markdown("**내용 미리보기:**")
-        st.info(source['content_preview'])
+        score = source.get('score', 0)
+        preview = source['content_preview'].replace("\n", " ")
+        lines.append(
+            f"**출처 {source['index']}: {source['knowledge_name']} - {source['source_file']}**\n\n"
+            f"| 페이지 | 유사도 | 지식 |\n"
+            f"|---|---|---|\n"
+            f"| {source['page']} | {score:.4f} | {source['knowledge_name']} |\n\n"
+            f"**내용 미리보기:**\n"
+            f"> {preview}"
+        )
+
+    return "\n\n".join(lines)
+
+
+def display_sources(sources: List[Dict[str, Any]]):
+    """출처 정보 표시
+
+    출처당 위젯 5개(markdown/columns/write x3/info)를 만들면 턴마다
+    컴포넌트 델타가 5N개 전송되므로 마크다운 호출 1회로 합침
+    """
+    st.markdown(_sources_markdown(sources))
+
+
+# 카드 스타일은 클래스로 한 번만 주입 - 카드마다 인라인 스타일을 반복하면
+# 턴/지식 수에 비례해 HTML 페이로드가 커짐
+_KB_STAT_CSS = (
+    "<style>"
+    ".kb-stat-row{display:flex;gap:12px}"
+    ".kb-stat-card{flex:1;padding:12px;background:#f0fdf4;"
+    "border:1px solid #bbf7d0;border-radius:8px;text-align:center}"
+    ".kb-stat-card .kb-name{font-size:18px;font-weight:700;"
+    "color:#15803d;margin-bottom:4px}"
+    ".kb-stat-card .kb-count{font-size:14px;color:#16a34a}"
+    "</style>"
+)
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _stat_card_html(knowledge_name: str, count: int) -> str:
+    """지식 사용량 카드 HTML ((이름, 개수) 기준 캐시 - rerun마다 재조립 방지)"""
+    return (
+        '<div class="kb-stat-card">'
+        f'<div class="kb-name">{knowledge_name}</div>'
+        f'<div class="kb-count">{count}개 문서</div>'
+        '</div>'
+    )
 
 
 def display_knowledge_stats(stats: Dict[str, int]):
     """지식별 사용 통계 표시"""
     if not stats or sum(stats.values()) == 0:
         return
-    
+
     st.markdown("---")
     st.markdown("##### 📊 사용된 지식베이스")
-    
-    cols = st.columns(len(stats))
-    for i, (knowledge_name, count) in enumerate(stats.items()):
-        with cols[i]:
-            st.markdown(f"""
-                <div style="
-                    padding: 12px;
-                    background: #f0fdf4;
-                    border: 1px solid #bbf7d0;
-                    border-radius: 8px;
-                    text-align: center;
-                ">
-                    <div style="
-                        font-size: 18px;
-                        font-weight: 700;
-                        color: #15803d;
-                        margin-bottom: 4px;
-                    ">{knowledge_name}</div>
-                    <div style="
-                        font-size: 14px;
-                        color: #16a34a;
-                    ">{count}개 문서</div>
-                </div>
-            """, unsafe_allow_html=True)
+
+    # 카드마다 st.columns + st.markdown을 만들면 rerun마다 컴포넌트 N개의
+    # 델타가 전송되므로 flex 컨테이너 하나에 담아 마크다운 호출 1회로 렌더링
+    cards = "".join(
+        _stat_card_html(knowledge_name, count)
+        for knowledge_name, count in stats.items()
+    )
+    st.markdown(
+        f'<div class="kb-stat-row">{cards}</div>',
+        unsafe_allow_html=True
+    )
+
+
+def _render_turn(chat_idx: int, show_sources: bool = True):
+    """
+    채팅 기록의 턴 하나(질문+답변+출처+통계) 렌더링
+
+    턴 단위 부분 rerun(@st.fragment, Streamlit 1.33+)을 쓸 수 있게
+    독립 함수로 분리 - 현재 고정 버전(1.29)에는 fragment API가 없어
+    데코레이터만 빠져 있는 상태
+
+    show_sources=False면 출처 expander를 생략 - 접힌 과거 턴은
+    expander 안에서 렌더링되는데 expander 중첩은 StreamlitAPIException
+    """
+    chat = st.session_state.chat_history[chat_idx]
+
+    # 사용자 질문
+    with st.chat_message("user"):
+        st.write(chat['question'])
+
+    # 낙관적 에코로 질문만 먼저 등록된 턴 - 답변은 아래 스트리밍 블록이 채움
+    if chat.get('pending'):
+        return
+
+    # AI 답변
+    with st.chat_message("assistant"):
+        if chat.get('error'):
+            st.error(f"질문 처리 중 오류 발생: {chat['error']}")
+            return
+
+        st.write(chat['answer'])
+
+        # 출처 표시
+        if show_sources and chat.get('sources'):
+            with st.expander("📚 출처 보기"):
+                display_sources(chat['sources'])
+
+        # 통계 표시
+        if chat.get('knowledge_stats'):
+            display_knowledge_stats(chat['knowledge_stats'])
 
 
 # 메인 UI
+st.markdown(_KB_STAT_CSS, unsafe_allow_html=True)
 st.title("💬 RAG 채팅")
 st.markdown("지식베이스를 선택하고 질문해보세요!")
 
 # 세션 상태 초기화
+# (무한정 쌓이면 긴 세션에서 rerun마다 전체 기록 렌더링이 계속 무거워지므로
+#  최근 100턴으로 제한)
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = deque(maxlen=100)
 
 # 사이드바: 설정
 with st.sidebar:
@@ -130,26 +265,31 @@ with st.sidebar:
     
     # 지식베이스 선택
     st.subheader("1. 지식베이스 선택")
-    available_knowledge = get_available_knowledge()
-    
+    available_knowledge = _fetch_available_knowledge()
+
+    # 관리자가 방금 새 지식을 임베딩한 경우를 위한 수동 갱신
+    if st.button("🔄 목록 새로고침"):
+        _fetch_available_knowledge.clear()
+        st.rerun()
+
     if not available_knowledge:
         st.warning("사용 가능한 지식베이스가 없습니다. 먼저 관리자 페이지에서 지식을 등록하고 임베딩하세요.")
         st.stop()
     
-    # 복수 선택 체크박스
-    selected_knowledge = []
-    
-    st.markdown("**사용할 지식 선택 (복수 선택 가능):**")
-    for kb in available_knowledge:
-        is_selected = st.checkbox(
-            label=kb['name'],
-            value=False,
-            key=f"kb_{kb['name']}",
-            help=kb['description'] if kb['description'] else "설명 없음"
-        )
-        if is_selected:
-            selected_knowledge.append(kb['name'])
-    
+    # 지식마다 체크박스를 만들면 rerun마다 위젯 N개의 상태를 읽고
+    # 직렬화해야 하므로 multiselect 위젯 1개로 통합
+    selected_knowledge = st.multiselect(
+        "사용할 지식 선택 (복수 선택 가능)",
+        options=[kb['name'] for kb in available_knowledge],
+        key="selected_knowledge"
+    )
+
+    # 선택된 지식의 간략 소개 표시
+    _descriptions = {kb['name']: kb['description'] for kb in available_knowledge}
+    for name in selected_knowledge:
+        if _descriptions.get(name):
+            st.caption(f"{name}: {_descriptions[name]}")
+
     if not selected_knowledge:
         st.warning("⚠️ 최소 1개 이상의 지식을 선택하세요")
     
@@ -157,22 +297,27 @@ with st.sidebar:
     
     # 고급 설정
     st.subheader("2. 검색 설정")
-    
-    top_k_per_knowledge = st.slider(
-        "각 지식에서 검색할 문서 수",
-        min_value=1,
-        max_value=10,
-        value=5,
-        help="각 지식베이스에서 가져올 관련 문서 개수"
-    )
-    
-    final_top_k = st.slider(
-        "최종 사용할 문서 수",
-        min_value=1,
-        max_value=20,
-        value=7,
-        help="답변 생성에 사용할 최종 문서 개수"
-    )
+
+    # 슬라이더 조작마다 전체 스크립트(채팅 기록 포함)가 재실행되지 않도록
+    # form으로 묶음 - 값은 '적용'을 눌렀을 때만 반영됨
+    with st.form("search_settings", clear_on_submit=False):
+        top_k_per_knowledge = st.slider(
+            "각 지식에서 검색할 문서 수",
+            min_value=1,
+            max_value=10,
+            value=5,
+            help="각 지식베이스에서 가져올 관련 문서 개수"
+        )
+
+        final_top_k = st.slider(
+            "최종 사용할 문서 수",
+            min_value=1,
+            max_value=20,
+            value=7,
+            help="답변 생성에 사용할 최종 문서 개수"
+        )
+
+        st.form_submit_button("적용", use_container_width=True)
 
     st.subheader("3. 모델 설정")
     
@@ -189,30 +334,26 @@ with st.sidebar:
     
     # 채팅 기록 초기화
     if st.button("🗑️ 채팅 기록 초기화", type="secondary"):
-        st.session_state.chat_history = []
+        st.session_state.chat_history = deque(maxlen=100)
         st.rerun()
 
 # 메인 영역: 채팅
 st.markdown("---")
 
-# 채팅 기록 표시
-for chat in st.session_state.chat_history:
-    # 사용자 질문
-    with st.chat_message("user"):
-        st.write(chat['question'])
-    
-    # AI 답변
-    with st.chat_message("assistant"):
-        st.write(chat['answer'])
-        
-        # 출처 표시
-        if chat.get('sources'):
-            with st.expander("📚 출처 보기"):
-                display_sources(chat['sources'])
-        
-        # 통계 표시
-        if chat.get('knowledge_stats'):
-            display_knowledge_stats(chat['knowledge_stats'])
+# 채팅 기록 표시: 최근 턴만 전체 렌더링하고 오래된 턴은 접어둠
+# (출처 표/통계 카드까지 전부 다시 그리는 비용을 최근 창으로 한정)
+_FULL_RENDER_TURNS = 20
+
+_history_len = len(st.session_state.chat_history)
+for chat_idx in range(_history_len):
+    if chat_idx < _history_len - _FULL_RENDER_TURNS:
+        _summary = st.session_state.chat_history[chat_idx]['question'][:40]
+        with st.expander(f"이전 대화 {chat_idx + 1}: {_summary}", expanded=False):
+            # expander는 중첩 불가(1.29에서 StreamlitAPIException)라
+            # 접힌 턴은 출처 expander 없이 렌더링
+            _render_turn(chat_idx, show_sources=False)
+    else:
+        _render_turn(chat_idx)
 
 # 질문 입력
 question = st.chat_input(
@@ -224,43 +365,53 @@ if question:
     if not selected_knowledge:
         st.error("❌ 지식베이스를 선택해주세요!")
     else:
-        # 사용자 질문 표시
-        with st.chat_message("user"):
-            st.write(question)
-        
-        # 답변 생성
-        with st.chat_message("assistant"):
-            with st.spinner("답변 생성 중..."):
-                result = ask_question(
-                    knowledge_names=selected_knowledge,
-                    question=question,
-                    top_k_per_knowledge=top_k_per_knowledge,
-                    final_top_k=final_top_k,
-                    use_reasoning_model=use_reasoning_model
-                )
-            
-            if result:
-                # 답변 표시
-                st.write(result['answer'])
-                
-                # 출처 표시
-                if result.get('sources'):
-                    with st.expander("📚 출처 보기"):
-                        display_sources(result['sources'])
-                
-                # 통계 표시
-                if result.get('knowledge_stats'):
-                    display_knowledge_stats(result['knowledge_stats'])
-                
-                # 채팅 기록에 추가
-                st.session_state.chat_history.append({
-                    'question': question,
-                    'answer': result['answer'],
-                    'sources': result.get('sources', []),
-                    'knowledge_stats': result.get('knowledge_stats', {})
-                })
-            else:
-                st.error("답변을 생성할 수 없습니다.")
+        # 낙관적 에코: 백엔드 응답을 기다리지 않고 질문을 먼저 기록에 넣고
+        # 즉시 rerun - 사용자 메시지가 요청 시작 전에 바로 화면에 나타남
+        st.session_state.chat_history.append({
+            'question': question,
+            'answer': '',
+            'sources': [],
+            'knowledge_stats': {},
+            'pending': True
+        })
+        st.rerun()
+
+# 직전 rerun에서 등록된 대기 중 질문이 있으면 답변 생성
+if st.session_state.chat_history and st.session_state.chat_history[-1].get('pending'):
+    chat = st.session_state.chat_history[-1]
+
+    # 답변 생성 (토큰 단위 스트리밍 표시)
+    with st.chat_message("assistant"):
+        answer = ""
+        try:
+            # st.write_stream은 1.31+ 전용이라 placeholder로 직접 누적 표시
+            placeholder = st.empty()
+            for delta in _coalesce(ask_question_stream(
+                knowledge_names=selected_knowledge,
+                question=chat['question'],
+                top_k_per_knowledge=top_k_per_knowledge,
+                final_top_k=final_top_k,
+                use_reasoning_model=use_reasoning_model
+            )):
+                answer += delta
+                # 스트리밍 중에는 마크다운 파싱을 건너뜀
+                # (청크마다 전체 본문을 다시 파싱하면 CPU가 파싱에 지배됨)
+                placeholder.text(answer + "▌")
+            # 완료 후 한 번만 마크다운으로 렌더링
+            placeholder.markdown(answer)
+        except Exception as e:
+            # 실패도 기록에 남겨 다음 rerun에서 해당 턴에 에러로 표시
+            chat['pending'] = False
+            chat['error'] = str(e)
+            st.rerun()
+
+        meta = st.session_state.pop('_last_meta', {})
+        chat['answer'] = answer
+        chat['sources'] = meta.get('sources', [])
+        chat['knowledge_stats'] = meta.get('knowledge_stats', {})
+        chat['pending'] = False
+        # 완성된 턴은 기록 루프가 출처/통계까지 렌더링
+        st.rerun()
 
 # 사용 팁
 st.markdown("---")